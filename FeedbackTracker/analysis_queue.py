@@ -0,0 +1,178 @@
+"""
+Background text analysis for submitted feedback
+
+In background mode submit_feedback commits FeedbackItems with
+analysis_status 'pending' and hands their ids to this queue. A worker pool
+then fills in sentiment_score, sentiment_label and aspect_based_results, so
+the submission request never waits on the analyzer or holds its write lock
+while it runs.
+"""
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from sqlalchemy import update
+
+from app import app, db
+from models import FeedbackItem, ANALYSIS_PENDING, ANALYSIS_PROCESSING, ANALYSIS_FAILED
+from bert_analysis import compute_analysis_batch, pinned_lexicon, warmup
+from analysis_service import get_analyses, apply_text_analysis, rating_scores
+from rollups import relabeling
+
+logger = logging.getLogger(__name__)
+
+MODE_INLINE = 'inline'
+MODE_BACKGROUND = 'background'
+
+EXECUTOR_THREAD = 'thread'
+EXECUTOR_PROCESS = 'process'
+
+_lock = threading.Lock()
+_writer = None  # Thread pool that runs the jobs and owns all database work
+_analyzer = None  # Process pool for the CPU-bound analysis in 'process' mode
+
+
+def is_background_mode():
+    """Return True if feedback text should be analyzed after submission"""
+    return app.config.get("ANALYSIS_MODE", MODE_INLINE) == MODE_BACKGROUND
+
+
+def enqueue(item_ids):
+    """Schedule background analysis of the given FeedbackItem ids"""
+    if item_ids:
+        _get_writer().submit(_analyze_items, list(item_ids))
+
+
+def enqueue_pending(chunk_size=1000):
+    """
+    Re-queue items still marked pending, e.g. because the process that
+    accepted them restarted before the analysis ran
+    
+    Every pending id is queued, one job per chunk_size ids. Each worker
+    process runs this at startup, but a job first claims its items (see
+    _claim), so every item is analyzed by one worker only.
+    
+    Returns:
+        int: Number of items queued
+    """
+    if multiprocessing.parent_process() is not None:
+        # Spawned analyzer processes re-import the entry module; they never schedule work
+        return 0
+
+    queued = 0
+    last_id = 0
+    while True:
+        item_ids = [item_id for item_id, in (db.session.query(FeedbackItem.id)
+                                             .filter(FeedbackItem.analysis_status == ANALYSIS_PENDING)
+                                             .filter(FeedbackItem.id > last_id)
+                                             .order_by(FeedbackItem.id)
+                                             .limit(chunk_size))]
+        if not item_ids:
+            break
+        enqueue(item_ids)
+        queued += len(item_ids)
+        last_id = item_ids[-1]
+    if queued:
+        logger.info(f"Queued {queued} pending feedback items for analysis")
+    return queued
+
+
+def shutdown(wait=True):
+    """Stop the worker pools, optionally waiting for queued jobs to finish"""
+    global _writer, _analyzer
+    with _lock:
+        if _writer is not None:
+            _writer.shutdown(wait=wait)
+        if _analyzer is not None:
+            _analyzer.shutdown(wait=wait)
+        _writer = _analyzer = None
+
+
+def _get_writer():
+    global _writer, _analyzer
+    with _lock:
+        if _writer is None:
+            workers = app.config.get("ANALYSIS_WORKERS", 2)
+            if app.config.get("ANALYSIS_EXECUTOR", EXECUTOR_THREAD) == EXECUTOR_PROCESS:
+                # Spawned children only run the pure analyzer and never touch the database
+                _analyzer = ProcessPoolExecutor(max_workers=workers,
+                                                mp_context=multiprocessing.get_context('spawn'),
+                                                initializer=warmup)
+                _writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='analysis')
+            else:
+                _writer = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='analysis')
+            logger.info(f"Started background analysis with {workers} {app.config.get('ANALYSIS_EXECUTOR')} workers")
+        return _writer
+
+
+def _compute_batch(texts, lexicon=None):
+    if _analyzer is None or not texts:
+        return compute_analysis_batch(texts, lexicon=lexicon)
+    return _analyzer.submit(compute_analysis_batch, texts, lexicon=lexicon).result()
+
+
+def _claim(item_ids):
+    """
+    Move the still pending items among item_ids to processing and return
+    their ids
+
+    The conditional UPDATE lets only one worker take each item, even when
+    several processes queued the same ids. Items left processing by a
+    crashed worker have no analyzer version, so reanalyze_stale.py finishes
+    them.
+    """
+    claimed = db.session.execute(update(FeedbackItem)
+                                 .where(FeedbackItem.id.in_(item_ids),
+                                        FeedbackItem.analysis_status == ANALYSIS_PENDING)
+                                 .values(analysis_status=ANALYSIS_PROCESSING)
+                                 .returning(FeedbackItem.id)).scalars().all()
+    db.session.commit()
+    return claimed
+
+
+def _analyze_items(item_ids):
+    with app.app_context():
+        claimed = []
+        try:
+            claimed = _claim(item_ids)
+            if not claimed:
+                return
+            items = (FeedbackItem.query
+                     .filter(FeedbackItem.id.in_(claimed))
+                     .filter(FeedbackItem.analysis_status == ANALYSIS_PROCESSING)
+                     .all())
+
+            # Stamp the items with the version of the lexicon that analyzed them
+            with pinned_lexicon():
+                results = get_analyses([item.text_feedback for item in items], compute_batch=_compute_batch)
+                analyzed = [(item, result) for item, (result, ok) in zip(items, results) if ok]
+                failed = [item for item, (_, ok) in zip(items, results) if not ok]
+                scores = rating_scores([item.id for item, _ in analyzed])
+                with relabeling([item.id for item, _ in analyzed]):
+                    for item, result in analyzed:
+                        apply_text_analysis(item, result, scores.get(item.id))
+            for item in failed:
+                # Keep the rating-based sentiment; reanalyze_stale.py retries the text
+                item.analysis_status = ANALYSIS_FAILED
+            if failed:
+                logger.error(f"Analysis failed for feedback items {[item.id for item in failed]}")
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error analyzing feedback items {item_ids}: {e}")
+            if claimed:
+                _mark_failed(claimed)
+
+
+def _mark_failed(item_ids):
+    try:
+        (FeedbackItem.query
+         .filter(FeedbackItem.id.in_(item_ids))
+         .filter(FeedbackItem.analysis_status == ANALYSIS_PROCESSING)
+         .update({FeedbackItem.analysis_status: ANALYSIS_FAILED}, synchronize_session=False))
+        db.session.commit()
+    except Exception as e:
+        # The items stay processing; reanalyze_stale.py still finds them
+        db.session.rollback()
+        logger.error(f"Error marking feedback items {item_ids} as failed: {e}")
@@ -0,0 +1,387 @@
+"""
+Feedback text analysis backed by the in-process cache and the durable
+analysis_result table, so results survive restarts and are shared between
+workers
+"""
+import copy
+import hashlib
+import json
+import logging
+
+from sqlalchemy import delete, insert, or_, update
+
+from app import db
+from models import AnalysisResult, FeedbackAspect, FeedbackItem, ANALYSIS_DONE
+from bert_analysis import (
+    analyzer_version, normalize_text, cached_result, cache_result,
+    compute_analysis, compute_analysis_batch, pinned_lexicon
+)
+from db_utils import insert_ignoring_conflicts
+from rollups import relabeling
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of hashes per IN (...) lookup
+LOOKUP_CHUNK_SIZE = 500
+
+
+def text_hash(text):
+    """Return the sha256 hex digest of the normalized text"""
+    return hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+
+
+def get_analysis(text):
+    """
+    Analyze feedback text, reusing a stored result when one exists
+    
+    Lookup order is the in-process cache, then the analysis_result table for
+    the current analyzer version, then the analyzer itself. Fresh results are
+    written back to both caches in the caller's transaction. All steps use
+    one lexicon snapshot, so a result is never stored under the version of
+    a lexicon reloaded meanwhile.
+    
+    Args:
+        text (str): The feedback text to analyze
+        
+    Returns:
+        tuple: ((sentiment_score, sentiment_label, aspects), ok) where ok is
+        False if the analyzer failed and defaults were substituted
+    """
+    if not text or len(text.strip()) == 0:
+        return (0.0, "neutral", {}), True  # Defaults for empty text
+
+    with pinned_lexicon():
+        result = cached_result(text)
+        if result is not None:
+            return result, True
+
+        digest = text_hash(text)
+        row = AnalysisResult.query.filter_by(text_hash=digest, analyzer_version=analyzer_version()).first()
+        if row is not None:
+            result = _row_result(row)
+            cache_result(text, result)
+            return result, True
+
+        result, ok = compute_analysis(text)
+        if ok:
+            cache_result(text, result)
+            _store_results({digest: result})
+        return result, ok
+
+
+def get_analyses(texts, compute_batch=compute_analysis_batch):
+    """
+    Batch counterpart of get_analysis for re-scoring jobs
+    
+    Stored results are fetched with chunked IN queries and only the misses
+    go through the batch analyzer. The in-process LRU cache is read but not
+    filled, so bulk jobs do not evict the hot interactive entries.
+    
+    Args:
+        texts (list): The feedback texts to analyze
+        compute_batch (callable): Called with the texts to analyze and
+            lexicon=, the snapshot all lookups of this call use
+        
+    Returns:
+        list: ((sentiment_score, sentiment_label, aspects), ok) pairs in input
+        order, where ok is False if the analyzer failed and defaults were
+        substituted
+    """
+    with pinned_lexicon() as lexicon:
+        return _get_analyses(texts, compute_batch, lexicon)
+
+
+def _get_analyses(texts, compute_batch, lexicon):
+    results = [None] * len(texts)
+    pending = {}  # text hash -> indexes into texts
+
+    for index, text in enumerate(texts):
+        if not text or len(text.strip()) == 0:
+            results[index] = ((0.0, "neutral", {}), True)
+            continue
+        cached = cached_result(text)
+        if cached is not None:
+            results[index] = (cached, True)
+            continue
+        pending.setdefault(text_hash(text), []).append(index)
+
+    version = analyzer_version()
+    digests = list(pending)
+    for start in range(0, len(digests), LOOKUP_CHUNK_SIZE):
+        rows = (AnalysisResult.query
+                .filter(AnalysisResult.analyzer_version == version)
+                .filter(AnalysisResult.text_hash.in_(digests[start:start + LOOKUP_CHUNK_SIZE]))
+                .all())
+        for row in rows:
+            for index in pending.pop(row.text_hash):
+                results[index] = (_row_result(row), True)
+
+    # Analyze one representative text per remaining hash
+    digests = list(pending)
+    computed = compute_batch([texts[pending[digest][0]] for digest in digests], lexicon=lexicon)
+    fresh = {}
+    for digest, (result, ok) in zip(digests, computed):
+        for index in pending[digest]:
+            results[index] = (copy.deepcopy(result), ok)
+        if ok:
+            fresh[digest] = result
+    _store_results(fresh)
+
+    return results
+
+
+def rating_sentiment(avg_rating):
+    """
+    Map an average star rating to a rating-based sentiment
+    
+    Returns:
+        tuple: (sentiment_score, sentiment_label)
+    """
+    # 1-1.8: Very Negative, 1.8-2.6: Negative, 2.6-3.4: Neutral, 3.4-4.2: Positive, 4.2-5: Very Positive
+    if avg_rating < 1.8:
+        return 0.1, "Very Negative"
+    elif avg_rating < 2.6:
+        return 0.3, "Negative"
+    elif avg_rating < 3.4:
+        return 0.5, "Neutral"
+    elif avg_rating < 4.2:
+        return 0.7, "Positive"
+    return 0.9, "Very Positive"
+
+
+def rating_scores(item_ids):
+    """
+    Return the rating-based sentiment score of stored FeedbackItems, from
+    their stored rating averages
+    
+    Returns:
+        dict: FeedbackItem id -> score, with unrated items omitted
+    """
+    rows = (db.session.query(FeedbackItem.id, FeedbackItem.avg_rating)
+            .filter(FeedbackItem.id.in_(item_ids))
+            .filter(FeedbackItem.avg_rating.isnot(None))
+            .all())
+    return {item_id: rating_sentiment(float(avg_rating))[0] for item_id, avg_rating in rows}
+
+
+def combine_sentiment(rating_score, text_score, text_label):
+    """
+    Combine the rating-based and text-based sentiment of a feedback item
+    
+    Returns:
+        tuple: (sentiment_score, sentiment_label)
+    """
+    if rating_score is None:
+        # Only text sentiment available
+        return text_score, text_label
+
+    # If we have both rating and text sentiment, use a weighted average (60% text, 40% rating)
+    combined_score = (text_score * 0.6) + (rating_score * 0.4)
+
+    # Determine label from combined score
+    if combined_score < 0.2:
+        combined_label = "very negative"
+    elif combined_score < 0.4:
+        combined_label = "negative"
+    elif combined_score < 0.6:
+        combined_label = "neutral"
+    elif combined_score < 0.8:
+        combined_label = "positive"
+    else:
+        combined_label = "very positive"
+    return combined_score, combined_label
+
+
+def analysis_values(result, rating_score):
+    """
+    Return the FeedbackItem column values for a successful (score, label,
+    aspects) text analysis result combined with the rating-based score (None
+    if unrated)
+    
+    The values stamp the item done with the current analyzer version, so
+    they must not be used for a failed analysis: its defaults would never
+    be re-analyzed.
+    """
+    text_score, text_label, aspects = result
+    sentiment_score, sentiment_label = combine_sentiment(rating_score, text_score, text_label)
+    return {
+        'sentiment_score': sentiment_score,
+        'sentiment_label': sentiment_label,
+        'aspect_based_results': json.dumps(aspects),
+        'analysis_status': ANALYSIS_DONE,
+        'analyzer_version': analyzer_version()
+    }
+
+
+def aspect_rows(aspects):
+    """
+    Return FeedbackAspect column values for an aspect analysis result
+    
+    Args:
+        aspects (dict): Aspect-based analysis results as stored in
+            aspect_based_results
+        
+    Returns:
+        list: One dict per mentioned aspect, without feedback_item_id
+    """
+    return [{
+        'aspect': aspect,
+        'score': int(data.get('score', 0)),
+        'sentiment': data.get('sentiment', 'neutral'),
+        'mention_count': len(data.get('mentions', [])) or 1
+    } for aspect, data in aspects.items()]
+
+
+def apply_text_analysis(item, result, rating_score):
+    """Store a text analysis result on a FeedbackItem, see analysis_values"""
+    for column, value in analysis_values(result, rating_score).items():
+        setattr(item, column, value)
+
+    # Replace the item's normalized aspect rows
+    if item.id is not None:
+        FeedbackAspect.query.filter_by(feedback_item_id=item.id).delete(synchronize_session=False)
+    for row in aspect_rows(result[2]):
+        item.aspects.append(FeedbackAspect(**row))
+
+
+def bulk_apply_analysis(item_rows, compute_batch=compute_analysis_batch):
+    """
+    Re-analyze stored FeedbackItems and write the results with one bulk UPDATE
+    
+    Items whose analysis failed are left untouched, so they keep their old
+    analyzer version and are picked up again by the next stale run.
+    
+    Args:
+        item_rows (list): (FeedbackItem id, text_feedback) pairs
+        compute_batch (callable): See get_analyses
+        
+    Returns:
+        tuple: (number of items updated, ids of the items whose analysis failed)
+    """
+    if not item_rows:
+        return 0, []
+
+    # Stamp the items with the version of the lexicon that analyzed them
+    with pinned_lexicon():
+        return _bulk_apply_analysis(item_rows, compute_batch)
+
+
+def _bulk_apply_analysis(item_rows, compute_batch):
+    item_ids = [item_id for item_id, _ in item_rows]
+    results = get_analyses([text for _, text in item_rows], compute_batch=compute_batch)
+    scores = rating_scores(item_ids)
+
+    mappings = []
+    aspect_mappings = []
+    failed_ids = []
+    for item_id, (result, ok) in zip(item_ids, results):
+        if not ok:
+            failed_ids.append(item_id)
+            continue
+        values = analysis_values(result, scores.get(item_id))
+        values['id'] = item_id
+        mappings.append(values)
+        for row in aspect_rows(result[2]):
+            row['feedback_item_id'] = item_id
+            aspect_mappings.append(row)
+    if failed_ids:
+        logger.warning(f"Analysis failed for {len(failed_ids)} feedback items, left unchanged: {failed_ids}")
+    if not mappings:
+        return 0, failed_ids
+
+    updated_ids = [values['id'] for values in mappings]
+    with relabeling(updated_ids):
+        db.session.execute(update(FeedbackItem), mappings)
+
+    # Replace the normalized aspect rows of the updated items
+    db.session.execute(delete(FeedbackAspect).where(FeedbackAspect.feedback_item_id.in_(updated_ids)))
+    if aspect_mappings:
+        db.session.execute(insert(FeedbackAspect), aspect_mappings)
+    return len(mappings), failed_ids
+
+
+def stale_items_query():
+    """Query for FeedbackItems with text analyzed by an older (or unknown) analyzer version"""
+    return (FeedbackItem.query
+            .filter(FeedbackItem.text_feedback.isnot(None))
+            .filter(FeedbackItem.text_feedback != '')
+            .filter(or_(FeedbackItem.analyzer_version.is_(None),
+                        FeedbackItem.analyzer_version != analyzer_version())))
+
+
+def reanalyze_stale(batch_size=500, max_rows=None, compute_batch=compute_analysis_batch):
+    """
+    Re-analyze only the FeedbackItems whose analyzer version is not the
+    current one, committing after every bounded batch
+    
+    Items whose analysis fails stay stale; the walk moves past them and a
+    later run retries them.
+    
+    Args:
+        batch_size (int): Rows re-analyzed and committed per batch
+        max_rows (int): Stop after this many rows (None for all stale rows)
+        compute_batch (callable): See get_analyses
+        
+    Returns:
+        int: Number of items re-analyzed
+    """
+    processed = 0
+    failed = 0
+    last_id = 0
+    while max_rows is None or processed + failed < max_rows:
+        limit = batch_size if max_rows is None else min(batch_size, max_rows - processed - failed)
+        rows = (stale_items_query()
+                .filter(FeedbackItem.id > last_id)
+                .with_entities(FeedbackItem.id, FeedbackItem.text_feedback)
+                .order_by(FeedbackItem.id)
+                .limit(limit)
+                .all())
+        if not rows:
+            break
+
+        try:
+            updated, failed_ids = bulk_apply_analysis([tuple(row) for row in rows], compute_batch=compute_batch)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        processed += updated
+        failed += len(failed_ids)
+        last_id = rows[-1][0]
+        logger.info(f"Re-analyzed {processed} stale feedback items (up to #{last_id})")
+
+    if failed:
+        logger.warning(f"{failed} stale feedback items failed analysis and are still stale")
+    return processed
+
+
+def purge_stale_results():
+    """Delete stored results produced by analyzer versions other than the current one"""
+    deleted = (AnalysisResult.query
+               .filter(AnalysisResult.analyzer_version != analyzer_version())
+               .delete(synchronize_session=False))
+    logger.info(f"Purged {deleted} stale analysis results")
+    return deleted
+
+
+def _store_results(results):
+    version = analyzer_version()
+    rows = [{
+        'text_hash': digest,
+        'analyzer_version': version,
+        'sentiment_score': float(score),
+        'sentiment_label': label,
+        'aspects_json': json.dumps(aspects)
+    } for digest, (score, label, aspects) in results.items()]
+    if not rows:
+        return
+    try:
+        with db.session.begin_nested():
+            insert_ignoring_conflicts(AnalysisResult, rows, ['text_hash', 'analyzer_version'])
+    except Exception as e:
+        # The stored copy is only an optimisation; never fail the caller over it
+        logger.error(f"Error storing analysis results: {e}")
+
+
+def _row_result(row):
+    return row.sentiment_score, row.sentiment_label, json.loads(row.aspects_json)
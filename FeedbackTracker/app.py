@@ -6,6 +6,9 @@ from sqlalchemy.orm import DeclarativeBase
 from werkzeug.middleware.proxy_fix import ProxyFix
 from flask_login import LoginManager
 
+import sqlite_profile
+from read_replica import ANALYTICS_BIND, RoutingSession
+
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
@@ -15,7 +18,7 @@ class Base(DeclarativeBase):
     pass
 
 
-db = SQLAlchemy(model_class=Base)
+db = SQLAlchemy(model_class=Base, session_options={'class_': RoutingSession})
 
 # Create the Flask app
 app = Flask(__name__)
@@ -32,9 +35,30 @@ app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
     "pool_recycle": 300,
     "pool_pre_ping": True,
 }
+# Optional read replica (or read-only SQLite snapshot) for the heavy
+# analytics and report views; see read_replica.py
+if os.environ.get("ANALYTICS_DATABASE_URL"):
+    app.config["SQLALCHEMY_BINDS"] = {ANALYTICS_BIND: os.environ["ANALYTICS_DATABASE_URL"]}
+
+# Text analysis: "inline" analyzes during submission, "background" commits the
+# feedback first and fills in sentiment from a thread or process worker pool
+app.config["ANALYSIS_MODE"] = os.environ.get("ANALYSIS_MODE", "inline")
+app.config["ANALYSIS_EXECUTOR"] = os.environ.get("ANALYSIS_EXECUTOR", "thread")
+app.config["ANALYSIS_WORKERS"] = int(os.environ.get("ANALYSIS_WORKERS", 2))
+# Load the analyzer at startup instead of on the first submission
+app.config["ANALYSIS_WARMUP"] = os.environ.get("ANALYSIS_WARMUP", "0") == "1"
+
+# Rows per page of the paginated lists (feedback tracking, messages, students)
+app.config["PAGE_SIZE"] = int(os.environ.get("PAGE_SIZE", 25))
+
+# SQLite connection settings (WAL, busy timeout, cache sizes); see sqlite_profile.py
+app.config["SQLITE_PROFILE"] = sqlite_profile.profile_from_env()
 
 # Initialize the app with the extension
 db.init_app(app)
+with app.app_context():
+    for bind_key, engine in db.engines.items():
+        sqlite_profile.install(engine, app.config["SQLITE_PROFILE"], read_only=bind_key == ANALYTICS_BIND)
 
 # Configure Flask-Login
 login_manager = LoginManager()
@@ -63,7 +87,10 @@ with app.app_context():
     try:
         # Import models to ensure they're registered with SQLAlchemy
         import models  # noqa: F401
-        db.create_all()
+        # Only the primary; a replica gets its schema from the primary
+        db.create_all(bind_key=None)
         logger.info("Database tables created successfully")
+        # Report the SQLite settings actually in effect
+        sqlite_profile.check_profile(db.engine, app.config["SQLITE_PROFILE"])
     except Exception as e:
         logger.error(f"Error creating database tables: {e}")
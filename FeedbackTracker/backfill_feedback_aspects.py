@@ -0,0 +1,78 @@
+"""
+Backfill the FeedbackAspect table from existing aspect_based_results JSON
+
+Importing the app creates the feedback_aspect table if it is missing. Items
+are walked in id order, and each chunk's aspect rows are replaced and
+committed, so the script can be re-run safely at any time.
+
+Usage:
+    python backfill_feedback_aspects.py [--chunk-size N]
+"""
+import argparse
+import json
+import logging
+
+from sqlalchemy import delete, insert
+
+from app import app, db
+from models import FeedbackAspect, FeedbackItem
+from analysis_service import aspect_rows
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def backfill_feedback_aspects(chunk_size=1000):
+    """
+    Rebuild FeedbackAspect rows for every item with aspect_based_results
+
+    Returns:
+        tuple: (items processed, aspect rows written)
+    """
+    items = 0
+    written = 0
+    last_id = 0
+    while True:
+        rows = (db.session.query(FeedbackItem.id, FeedbackItem.aspect_based_results)
+                .filter(FeedbackItem.id > last_id)
+                .filter(FeedbackItem.aspect_based_results.isnot(None))
+                .order_by(FeedbackItem.id)
+                .limit(chunk_size)
+                .all())
+        if not rows:
+            break
+
+        mappings = []
+        for item_id, aspects_json in rows:
+            try:
+                aspects = json.loads(aspects_json)
+            except (json.JSONDecodeError, TypeError):
+                logger.warning(f"Skipping FeedbackItem #{item_id}: invalid aspect_based_results")
+                continue
+            for row in aspect_rows(aspects):
+                row['feedback_item_id'] = item_id
+                mappings.append(row)
+
+        item_ids = [item_id for item_id, _ in rows]
+        db.session.execute(delete(FeedbackAspect).where(FeedbackAspect.feedback_item_id.in_(item_ids)))
+        if mappings:
+            db.session.execute(insert(FeedbackAspect), mappings)
+        db.session.commit()
+
+        items += len(rows)
+        written += len(mappings)
+        last_id = item_ids[-1]
+        logger.info(f"Backfilled {items} feedback items (up to #{last_id})")
+
+    return items, written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill FeedbackAspect rows from aspect_based_results")
+    parser.add_argument('--chunk-size', type=int, default=1000, help="items per commit")
+    args = parser.parse_args()
+
+    with app.app_context():
+        items, written = backfill_feedback_aspects(chunk_size=args.chunk_size)
+        logger.info(f"Wrote {written} aspect rows for {items} feedback items")
@@ -0,0 +1,70 @@
+"""
+Backfill the FeedbackTheme keyword counters for existing feedback text
+
+Importing the app creates the feedback_theme table if it is missing. Items
+with text are walked in id order; each chunk's counters are replaced and
+committed, so the script can be re-run safely (e.g. after editing
+IMPROVEMENT_THEMES).
+
+Usage:
+    python backfill_feedback_themes.py [--chunk-size N]
+"""
+import argparse
+import logging
+
+from sqlalchemy import delete, insert
+
+from app import app, db
+from models import FeedbackItem, FeedbackTheme
+from feedback_themes import theme_rows
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def backfill_feedback_themes(chunk_size=1000):
+    """
+    Rebuild FeedbackTheme counters for every item with text feedback
+
+    Returns:
+        tuple: (items processed, counter rows written)
+    """
+    items = 0
+    written = 0
+    last_id = 0
+    while True:
+        rows = (db.session.query(FeedbackItem.id, FeedbackItem.text_feedback)
+                .filter(FeedbackItem.id > last_id)
+                .filter(FeedbackItem.text_feedback.isnot(None))
+                .filter(FeedbackItem.text_feedback != '')
+                .order_by(FeedbackItem.id)
+                .limit(chunk_size)
+                .all())
+        if not rows:
+            break
+
+        mappings = [row for item_id, text in rows for row in theme_rows(item_id, text)]
+
+        item_ids = [item_id for item_id, _ in rows]
+        db.session.execute(delete(FeedbackTheme).where(FeedbackTheme.feedback_item_id.in_(item_ids)))
+        if mappings:
+            db.session.execute(insert(FeedbackTheme), mappings)
+        db.session.commit()
+
+        items += len(rows)
+        written += len(mappings)
+        last_id = item_ids[-1]
+        logger.info(f"Backfilled {items} feedback items (up to #{last_id})")
+
+    return items, written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill FeedbackTheme keyword counters")
+    parser.add_argument('--chunk-size', type=int, default=1000, help="items per commit")
+    args = parser.parse_args()
+
+    with app.app_context():
+        items, written = backfill_feedback_themes(chunk_size=args.chunk_size)
+        logger.info(f"Wrote {written} theme counters for {items} feedback items")
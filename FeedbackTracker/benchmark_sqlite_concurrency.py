@@ -0,0 +1,155 @@
+"""
+Benchmark concurrent reads and writes on SQLite with and without the
+performance profile of sqlite_profile.py
+
+Reader threads run indexed aggregate queries while writer threads insert
+and commit rows, each thread on its own pooled connection as gunicorn
+workers would be. The run is repeated on a scratch database with SQLite's
+default rollback journal and with the configured profile (WAL, busy
+timeout, ...), reporting throughput, read latency and "database is locked"
+failures for both.
+
+Usage:
+    python benchmark_sqlite_concurrency.py [--seconds N] [--readers N] [--writers N] [--rows N]
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+import sqlite_profile
+
+SCHEMA = """
+    CREATE TABLE feedback_bench (
+        id INTEGER PRIMARY KEY,
+        student_id INTEGER NOT NULL,
+        submission_date DATETIME NOT NULL,
+        rating INTEGER NOT NULL,
+        text_feedback TEXT
+    )
+"""
+INDEX = "CREATE INDEX ix_feedback_bench_student_date ON feedback_bench (student_id, submission_date)"
+READ = text("SELECT count(*), avg(rating) FROM feedback_bench "
+            "WHERE student_id = :student_id AND submission_date >= :from_date")
+WRITE = text("INSERT INTO feedback_bench (student_id, submission_date, rating, text_feedback) "
+             "VALUES (:student_id, :submission_date, :rating, :text_feedback)")
+
+STUDENTS = 500
+
+
+def seed(engine, rows):
+    rng = random.Random(3)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.exec_driver_sql(SCHEMA)
+        conn.exec_driver_sql(INDEX)
+        conn.execute(WRITE, [{'student_id': rng.randrange(STUDENTS),
+                              'submission_date': now - timedelta(minutes=rng.randrange(60 * 24 * 365)),
+                              'rating': rng.randint(1, 5),
+                              'text_feedback': 'seeded feedback text ' * 5} for _ in range(rows)])
+
+
+def run(profile, args):
+    """Run one benchmark round; return the measured counters"""
+    path = tempfile.NamedTemporaryFile(suffix='.db', delete=False).name
+    engine = create_engine(f"sqlite:///{path}", pool_size=args.readers + args.writers, max_overflow=0)
+    sqlite_profile.install(engine, profile)
+    try:
+        seed(engine, args.rows)
+        journal_mode = sqlite_profile.effective_settings(engine)['journal_mode']
+
+        stop = threading.Event()
+        lock = threading.Lock()
+        results = {'reads': 0, 'writes': 0, 'read_errors': 0, 'write_errors': 0, 'read_latency': []}
+
+        def reader(seed_value):
+            rng = random.Random(seed_value)
+            from_date = datetime.utcnow() - timedelta(days=90)
+            reads, errors, latencies = 0, 0, []
+            while not stop.is_set():
+                started = time.perf_counter()
+                try:
+                    with engine.connect() as conn:
+                        conn.execute(READ, {'student_id': rng.randrange(STUDENTS), 'from_date': from_date}).one()
+                    reads += 1
+                    latencies.append(time.perf_counter() - started)
+                except OperationalError:
+                    errors += 1
+            with lock:
+                results['reads'] += reads
+                results['read_errors'] += errors
+                results['read_latency'].extend(latencies)
+
+        def writer(seed_value):
+            rng = random.Random(seed_value)
+            writes, errors = 0, 0
+            while not stop.is_set():
+                try:
+                    with engine.begin() as conn:
+                        conn.execute(WRITE, {'student_id': rng.randrange(STUDENTS),
+                                             'submission_date': datetime.utcnow(),
+                                             'rating': rng.randint(1, 5),
+                                             'text_feedback': 'benchmark feedback text ' * 5})
+                    writes += 1
+                except OperationalError:
+                    errors += 1
+            with lock:
+                results['writes'] += writes
+                results['write_errors'] += errors
+
+        threads = ([threading.Thread(target=reader, args=(n,)) for n in range(args.readers)] +
+                   [threading.Thread(target=writer, args=(100 + n,)) for n in range(args.writers)])
+        for thread in threads:
+            thread.start()
+        time.sleep(args.seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+        results['journal_mode'] = journal_mode
+        return results
+    finally:
+        engine.dispose()
+        for suffix in ('', '-wal', '-shm', '-journal'):
+            if os.path.exists(path + suffix):
+                os.unlink(path + suffix)
+
+
+def report(name, results, seconds):
+    latencies = sorted(results['read_latency'])
+    p50 = statistics.median(latencies) * 1000 if latencies else 0
+    p95 = latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0
+    print(f"{name:<10}{results['journal_mode']:>9}"
+          f"{results['reads'] / seconds:>11.0f}{results['writes'] / seconds:>11.0f}"
+          f"{p50:>9.2f}{p95:>9.2f}"
+          f"{results['read_errors']:>9}{results['write_errors']:>9}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark SQLite concurrency with and without the profile")
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--rows', type=int, default=20000, help="rows seeded before the run")
+    args = parser.parse_args()
+
+    profile = sqlite_profile.profile_from_env() or dict(
+        (pragma, default) for pragma, _, default in sqlite_profile.PRAGMA_SETTINGS)
+    rounds = [
+        # SQLite defaults, apart from the rollback journal being forced back on
+        ('default', {'journal_mode': 'DELETE'}),
+        ('profile', profile),
+    ]
+
+    print(f"{args.readers} readers, {args.writers} writers, {args.seconds}s per round, {args.rows} seeded rows")
+    print(f"{'round':<10}{'journal':>9}{'reads/s':>11}{'writes/s':>11}{'p50 ms':>9}{'p95 ms':>9}"
+          f"{'rd errs':>9}{'wr errs':>9}")
+    for name, round_profile in rounds:
+        report(name, run(round_profile, args), args.seconds)
@@ -1,38 +1,58 @@
+import copy
+import hashlib
 import logging
 import json
 import re
-import nltk
 import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Protocol
+import numpy as np
+
+from micro_batch import MicroBatchScheduler
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Flag to track whether NLTK resources have been checked
-nltk_resources_checked = False
+# Bundled offline resources; the analyzer never downloads anything and
+# nothing is loaded until the model is first used (or warmup() is called)
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+STOPWORDS_FILE = os.path.join(DATA_DIR, 'stopwords_english.txt')
+LEMMAS_FILE = os.path.join(DATA_DIR, 'lemmas_english.tsv')
+LEXICON_FILE = os.environ.get("LEXICON_FILE", os.path.join(DATA_DIR, 'lexicon.json'))
 
-# Function to lazily check and download NLTK resources when needed
-def ensure_nltk_resources():
-    global nltk_resources_checked
-    if not nltk_resources_checked:
-        try:
-            nltk.data.find('tokenizers/punkt')
-            nltk.data.find('corpora/stopwords')
-            nltk.data.find('corpora/wordnet')
-        except LookupError:
-            logger.info("Downloading NLTK resources...")
-            nltk.download('punkt')
-            nltk.download('stopwords')
-            nltk.download('wordnet')
-        nltk_resources_checked = True
-
-# Download required NLTK resources on import
-ensure_nltk_resources()
-
-# Now import the NLTK modules after resources are downloaded
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-from nltk.stem import WordNetLemmatizer
+
+def _data_lines(path):
+    # Non-empty, non-comment lines of a bundled data file
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                yield line
+
+
+def load_stop_words():
+    """Return the bundled English stop word list"""
+    return frozenset(_data_lines(STOPWORDS_FILE))
+
+
+def load_lemmas():
+    """Return the bundled inflected-form -> lemma table"""
+    return dict(line.split('\t') for line in _data_lines(LEMMAS_FILE))
+
+
+def load_word_tokenizer():
+    """Return NLTK's Treebank-style word tokenizer, which needs no downloaded data"""
+    try:
+        from nltk.tokenize import NLTKWordTokenizer
+    except ImportError:
+        logger.warning("NLTK is not installed, falling back to whitespace tokenization")
+        return str.split
+    return NLTKWordTokenizer().tokenize
 
 # We're using a mock BERT implementation, so no need for real TensorFlow
 # Dummy classes to replace TensorFlow
@@ -40,10 +60,6 @@ class DummyTokenizer:
     def __init__(self, num_words=None):
         self.num_words = num_words
 
-# Initialize lemmatizer and stop words after ensuring resources exist
-lemmatizer = WordNetLemmatizer()
-stop_words = set(stopwords.words('english'))
-
 # Define aspect categories relevant to educational feedback
 ASPECTS = [
     "teaching_quality", 
@@ -56,37 +72,295 @@ ASPECTS = [
     "general"
 ]
 
+# Sentiment lexicons and aspect keywords live in LEXICON_FILE; see Lexicon
+
+# Number of tokens on each side of an aspect mention checked for sentiment
+ASPECT_WINDOW = 3
+
+# Number of texts packed into one token-id matrix by the batch APIs
+BATCH_CHUNK_SIZE = 512
+
+# Version of the analyzer's code; bump it whenever tokenization or scoring
+# change so cached results from older analyzers are not reused (lexicon
+# edits are covered by a hash of the lexicon file's contents)
+ANALYZER_VERSION = "2"
+
+# Longest analyzer_version() result, the size of the analyzer_version columns
+ANALYZER_VERSION_MAX_LENGTH = 64
+
+# Seconds between checks of LEXICON_FILE for changes (0 checks on every use)
+LEXICON_RELOAD_INTERVAL = float(os.environ.get("LEXICON_RELOAD_INTERVAL", 2.0))
+
+# Maximum number of texts kept in the in-process result cache (0 disables it)
+ANALYSIS_CACHE_SIZE = int(os.environ.get("ANALYSIS_CACHE_SIZE", 4096))
+
+# Sentiment backend used by get_model(), by name in BACKENDS
+SENTIMENT_BACKEND = os.environ.get("SENTIMENT_BACKEND", "mock")
+
+# Micro-batching of concurrent single-text analyses: wait up to this many
+# milliseconds for other requests to join a batch (0 disables it) ...
+MICRO_BATCH_WAIT_MS = float(os.environ.get("MICRO_BATCH_WAIT_MS", 0))
+# ... and never put more than this many texts in one backend call
+MICRO_BATCH_SIZE = int(os.environ.get("MICRO_BATCH_SIZE", 32))
+
+
+class SentimentBackend(Protocol):
+    """
+    Interface every sentiment backend implements
+    
+    Backends work on token documents produced by their own tokenize(), so
+    each text is preprocessed once for both sentiment and aspects. A backend
+    may also provide predict_sentiment_tokens() and extract_aspects_tokens()
+    for a cheaper single-document path; otherwise single texts are run as a
+    batch of one.
+    """
+    name: str
+
+    def tokenize(self, text):
+        """Return the token document for one text"""
+        ...
+
+    def predict_batch(self, docs):
+        """Return one (score, label) tuple per token document"""
+        ...
+
+    def extract_aspects_batch(self, docs):
+        """Return one aspect-result dict per token document"""
+        ...
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton over the aspect keywords
+
+    A word is scanned once, character by character, and every aspect keyword
+    it contains is reported, matching the `keyword in word` substring test.
+    Results are memoized per distinct word, so repeated tokens cost a single
+    dictionary lookup.
+    """
+
+    # Upper bound on memoized words before the memo is reset
+    MEMO_LIMIT = 50000
+
+    def __init__(self, aspect_keywords):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [()]
+        self._memo = {}
+
+        # Keyword ids follow definition order so hits come back in that order
+        keyword_id = 0
+        for aspect, keywords in aspect_keywords.items():
+            for keyword in keywords:
+                node = 0
+                for char in keyword:
+                    if char not in self._goto[node]:
+                        self._goto[node][char] = len(self._goto)
+                        self._goto.append({})
+                        self._fail.append(0)
+                        self._output.append(())
+                    node = self._goto[node][char]
+                self._output[node] += ((keyword_id, aspect),)
+                keyword_id += 1
+
+        # Breadth-first pass to build failure links and merge outputs
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._output[child] += self._output[self._fail[child]]
+
+    def match(self, word):
+        """Return the aspect of every keyword found in word, one entry per keyword"""
+        hits = self._memo.get(word)
+        if hits is None:
+            found = set()
+            node = 0
+            for char in word:
+                while node and char not in self._goto[node]:
+                    node = self._fail[node]
+                node = self._goto[node].get(char, 0)
+                found.update(self._output[node])
+            hits = tuple(aspect for _, aspect in sorted(found))
+            if len(self._memo) >= self.MEMO_LIMIT:
+                self._memo.clear()
+            self._memo[word] = hits
+        return hits
+
+
+class Lexicon:
+    """
+    Immutable, compiled form of the lexicon file
+    
+    Word lists become frozensets so membership tests in the hot loops are
+    O(1), and the aspect keywords are compiled into a KeywordMatcher shared
+    by the scalar and batch aspect extractors. A reload builds a new
+    Lexicon and swaps the reference, so readers always see one consistent
+    version.
+    
+    The version combines the file's "version" field with a hash of its
+    contents, so an edit that forgets to bump the field still gets a new
+    version and never reuses results stored for the old word lists.
+    """
+
+    def __init__(self, data, mtime=None, digest=None):
+        self.version = f"{data['version']}+{digest}" if digest else str(data['version'])
+        self.positive = frozenset(data['positive'])
+        self.negative = frozenset(data['negative'])
+        self.aspect_positive = frozenset(data['aspect_positive'])
+        self.aspect_negative = frozenset(data['aspect_negative'])
+        # Aspect order is significant: results are reported in file order
+        self.aspect_keywords = {aspect: tuple(keywords) for aspect, keywords in data['aspect_keywords'].items()}
+        self.aspects = tuple(self.aspect_keywords)
+        self.matcher = KeywordMatcher(self.aspect_keywords)
+        self.mtime = mtime
+
+
+def load_lexicon(path=None):
+    """
+    Read and compile a lexicon file
+    
+    Args:
+        path (str): Lexicon JSON file (defaults to LEXICON_FILE)
+        
+    Returns:
+        Lexicon: The compiled lexicon
+    """
+    path = path or LEXICON_FILE
+    mtime = os.stat(path).st_mtime_ns
+    with open(path, 'rb') as f:
+        content = f.read()
+    digest = hashlib.sha256(content).hexdigest()[:8]
+    return Lexicon(json.loads(content.decode('utf-8')), mtime=mtime, digest=digest)
+
+
+_lexicon = None
+_lexicon_checked = 0.0
+_lexicon_rejected = None  # mtime of a file that failed to load, not retried
+_lexicon_lock = threading.Lock()
+_pinned_lexicon = ContextVar('pinned_lexicon', default=None)
+
+def get_lexicon():
+    """
+    Return the current compiled lexicon, reloading it if the file changed
+    
+    The file's modification time is checked at most every
+    LEXICON_RELOAD_INTERVAL seconds. A file that fails to load is logged and
+    the previous lexicon stays in use. Inside pinned_lexicon() the pinned
+    lexicon is returned instead.
+    """
+    global _lexicon, _lexicon_checked, _lexicon_rejected
+    pinned = _pinned_lexicon.get()
+    if pinned is not None:
+        return pinned
+    lexicon = _lexicon
+    now = time.monotonic()
+    if lexicon is not None and now - _lexicon_checked < LEXICON_RELOAD_INTERVAL:
+        return lexicon
+
+    with _lexicon_lock:
+        if _lexicon is not None and now - _lexicon_checked < LEXICON_RELOAD_INTERVAL:
+            return _lexicon
+        _lexicon_checked = now
+        if _lexicon is None:
+            _lexicon = load_lexicon()
+            return _lexicon
+        try:
+            mtime = os.stat(LEXICON_FILE).st_mtime_ns
+        except OSError as e:
+            logger.error(f"Cannot stat lexicon {LEXICON_FILE}, keeping version {_lexicon.version}: {e}")
+            return _lexicon
+        if mtime in (_lexicon.mtime, _lexicon_rejected):
+            return _lexicon
+
+        try:
+            fresh = load_lexicon()
+        except Exception as e:
+            _lexicon_rejected = mtime
+            logger.error(f"Error reloading lexicon from {LEXICON_FILE}, keeping version {_lexicon.version}: {e}")
+            return _lexicon
+        logger.info(f"Lexicon reloaded: version {_lexicon.version} -> {fresh.version}")
+        _lexicon = fresh
+        return _lexicon
+
+
+@contextmanager
+def pinned_lexicon(lexicon=None):
+    """
+    Use one lexicon for the whole block, even if the file is reloaded meanwhile
+    
+    get_lexicon() and analyzer_version() in the block (on this thread) see
+    the given lexicon, or the current one by default, so a cache lookup, the
+    analysis and the version its result is stored under always agree.
+    Without a lexicon, nested blocks keep the one already pinned.
+    
+    Yields:
+        Lexicon: The pinned lexicon
+    """
+    lexicon = lexicon or get_lexicon()
+    token = _pinned_lexicon.set(lexicon)
+    try:
+        yield lexicon
+    finally:
+        _pinned_lexicon.reset(token)
+
+
 # Mock BERT model implementation
 # In a real implementation, you would load a pre-trained BERT model
 # For this demo, we'll simulate the model's behavior
 class MockBertModel:
+    name = "mock"
+
     def __init__(self):
         self.tokenizer = DummyTokenizer(num_words=5000)
-        
-    def preprocess_text(self, text):
+        self.word_tokenize = load_word_tokenizer()
+        self.stop_words = load_stop_words()
+        self.lemmas = load_lemmas()
+
+
+    def tokenize(self, text):
+        """Clean, tokenize, drop stop words and lemmatize text in a single pass.
+
+        The returned token list is the shared document that both sentiment
+        prediction and aspect extraction consume, so callers that need both
+        only pay for preprocessing once.
+        """
         # Clean text
         text = text.lower()
         text = re.sub(r'[^\w\s]', '', text)
-        
+
         # Tokenize
-        tokens = word_tokenize(text)
-        
+        tokens = self.word_tokenize(text)
+
         # Remove stop words and lemmatize
-        tokens = [lemmatizer.lemmatize(word) for word in tokens if word not in stop_words]
-        
-        return ' '.join(tokens)
-    
+        lemmas = self.lemmas
+        return [lemmas.get(word, word) for word in tokens if word not in self.stop_words]
+
+    def preprocess_text(self, text):
+        return ' '.join(self.tokenize(text))
+
     def predict_sentiment(self, text):
         # Mock sentiment prediction
         # In reality, this would use a trained BERT model
-        text = self.preprocess_text(text)
-        
+        return self.predict_sentiment_tokens(self.tokenize(text))
+
+    def predict_sentiment_tokens(self, words):
         # Simple rule-based approach for demonstration
-        positive_words = ['good', 'great', 'excellent', 'helpful', 'best', 'amazing', 'perfect', 'love', 'enjoy']
-        negative_words = ['bad', 'poor', 'terrible', 'worst', 'hate', 'difficult', 'unfair', 'inadequate', 'waste']
-        
-        pos_count = sum(1 for word in text.split() if word in positive_words)
-        neg_count = sum(1 for word in text.split() if word in negative_words)
+        lexicon = get_lexicon()
+        positive = lexicon.positive
+        negative = lexicon.negative
+        pos_count = 0
+        neg_count = 0
+        for word in words:
+            if word in positive:
+                pos_count += 1
+            if word in negative:
+                neg_count += 1
         
         # Calculate sentiment score between -1 and 1
         total = pos_count + neg_count
@@ -95,92 +369,335 @@ class MockBertModel:
         else:
             score = (pos_count - neg_count) / total
         
-        # Determine sentiment label
-        if score > 0.2:
-            label = "positive"
-        elif score < -0.2:
-            label = "negative"
-        else:
-            label = "neutral"
-        
-        return score, label
+        return score, sentiment_label(score)
     
     def extract_aspects(self, text):
         # Mock aspect extraction
         # In reality, this would use more sophisticated NLP techniques
-        text = self.preprocess_text(text)
-        words = text.split()
+        return self.extract_aspects_tokens(self.tokenize(text))
+
+    def extract_aspects_tokens(self, words):
+        # Sentiment of the window around every position, in one pass
+        lexicon = get_lexicon()
+        votes = _window_votes(words, lexicon)
         
-        # Keywords for each aspect
-        aspect_keywords = {
-            "teaching_quality": ['teaching', 'lecture', 'teacher', 'professor', 'explain', 'clarity', 'instructor'],
-            "course_content": ['content', 'material', 'syllabus', 'curriculum', 'topic', 'subject', 'course'],
-            "infrastructure": ['classroom', 'building', 'facility', 'campus', 'wifi', 'infrastructure'],
-            "lab_facilities": ['lab', 'laboratory', 'equipment', 'practical', 'experiment', 'instrument'],
-            "administration": ['admin', 'office', 'staff', 'management', 'registration', 'administrative'],
-            "library_resources": ['library', 'book', 'resource', 'study', 'reference', 'journal'],
-            "extracurricular": ['event', 'activity', 'club', 'sport', 'cultural', 'fest', 'competition'],
-            "general": ['overall', 'general', 'college', 'university', 'institution', 'education']
-        }
+        # Identify aspects mentioned in the text with a single linear scan
+        scores = {}
+        matches = {}
+        match = lexicon.matcher.match
+        for position, word in enumerate(words):
+            for aspect in match(word):
+                matches.setdefault(aspect, []).append(word)
+                scores[aspect] = scores.get(aspect, 0) + votes[position]
         
-        # Identify aspects mentioned in the text
+        # Only include aspects that were mentioned, in lexicon order
         mentioned_aspects = {}
-        
-        for aspect, keywords in aspect_keywords.items():
-            aspect_score = 0
-            matches = []
-            
-            for keyword in keywords:
-                for word in words:
-                    if keyword in word:
-                        matches.append(word)
-                        
-                        # Check nearby words for sentiment
-                        idx = words.index(word)
-                        nearby_words = words[max(0, idx-3):min(len(words), idx+4)]
-                        
-                        # Simple sentiment calculation
-                        positive_words = ['good', 'great', 'excellent', 'helpful', 'best']
-                        negative_words = ['bad', 'poor', 'terrible', 'worst', 'inadequate']
-                        
-                        pos_count = sum(1 for w in nearby_words if w in positive_words)
-                        neg_count = sum(1 for w in nearby_words if w in negative_words)
-                        
-                        # Update aspect sentiment
-                        if pos_count > neg_count:
-                            aspect_score += 1
-                        elif neg_count > pos_count:
-                            aspect_score -= 1
-            
-            # Only include aspects that were mentioned
-            if matches:
+        for aspect in lexicon.aspects:
+            if aspect in matches:
                 mentioned_aspects[aspect] = {
+                    "score": scores[aspect],
+                    "sentiment": aspect_sentiment_label(scores[aspect]),
+                    "mentions": matches[aspect]
+                }
+        
+        return mentioned_aspects
+
+    def predict_batch(self, docs):
+        """Score many token documents at once with NumPy lexicon lookups.
+
+        Returns one (score, label) tuple per document, identical to calling
+        predict_sentiment_tokens() on each of them.
+        """
+        lexicon = get_lexicon()
+        matrix, vocab = build_token_matrix(docs)
+        pos_counts = _lexicon_table(vocab, lexicon.positive)[matrix].sum(axis=1)
+        neg_counts = _lexicon_table(vocab, lexicon.negative)[matrix].sum(axis=1)
+
+        # Calculate sentiment scores between -1 and 1 for the whole batch
+        totals = pos_counts + neg_counts
+        scores = (pos_counts - neg_counts) / np.maximum(totals, 1)
+
+        results = []
+        for total, score in zip(totals.tolist(), scores.tolist()):
+            score = score if total else 0  # Neutral if no sentiment words
+            results.append((score, sentiment_label(score)))
+        return results
+
+    def extract_aspects_batch(self, docs):
+        """Extract aspects for many token documents at once.
+
+        Keyword hits and the sentiment window around every mention are
+        computed as array operations over the batch token-id matrix; only
+        the final per-document result dictionaries are built in Python.
+        Output is identical to calling extract_aspects_tokens() on each
+        document.
+        """
+        results = [{} for _ in docs]
+        lexicon = get_lexicon()
+        matrix, vocab = build_token_matrix(docs)
+        if not vocab:
+            return results
+        width = matrix.shape[1]
+        words = np.array(list(vocab) + [''], dtype=object)
+
+        # Window sentiment around every position from cumulative lexicon hits
+        positions = np.arange(width)
+        lo = np.maximum(positions - ASPECT_WINDOW, 0)
+        hi = np.minimum(positions + ASPECT_WINDOW + 1, width)
+        pos_hits = np.cumsum(_lexicon_table(vocab, lexicon.aspect_positive)[matrix], axis=1)
+        neg_hits = np.cumsum(_lexicon_table(vocab, lexicon.aspect_negative)[matrix], axis=1)
+        pos_hits = np.pad(pos_hits, ((0, 0), (1, 0)))
+        neg_hits = np.pad(neg_hits, ((0, 0), (1, 0)))
+        votes = np.sign((pos_hits[:, hi] - pos_hits[:, lo]) - (neg_hits[:, hi] - neg_hits[:, lo]))
+
+        hit_table = _aspect_hit_table(vocab, lexicon)
+        for column, aspect in enumerate(lexicon.aspects):
+            hits = hit_table[:, column][matrix]
+            scores = (votes * hits).sum(axis=1)
+            mentions = {}
+            hit_rows, hit_cols = np.nonzero(hits)
+            for row, word, count in zip(hit_rows.tolist(),
+                                        words[matrix[hit_rows, hit_cols]].tolist(),
+                                        hits[hit_rows, hit_cols].tolist()):
+                mentions.setdefault(row, []).extend([word] * count)
+
+            for row, matches in mentions.items():
+                aspect_score = int(scores[row])
+                results[row][aspect] = {
                     "score": aspect_score,
-                    "sentiment": "positive" if aspect_score > 0 else "negative" if aspect_score < 0 else "neutral",
+                    "sentiment": aspect_sentiment_label(aspect_score),
                     "mentions": matches
                 }
+
+        return results
+
+
+def sentiment_label(score):
+    """Map a sentiment score between -1 and 1 to its label"""
+    if score > 0.2:
+        return "positive"
+    elif score < -0.2:
+        return "negative"
+    return "neutral"
+
+
+def aspect_sentiment_label(aspect_score):
+    """Map an aggregated aspect score to its label"""
+    return "positive" if aspect_score > 0 else "negative" if aspect_score < 0 else "neutral"
+
+
+def build_token_matrix(docs):
+    """
+    Encode token documents as a padded matrix of integer token ids
+    
+    Args:
+        docs (list): Token lists as returned by MockBertModel.tokenize
         
-        return mentioned_aspects
+    Returns:
+        tuple: (matrix, vocab) where padding cells hold -1 and vocab maps
+        each word to its id in first-seen order
+    """
+    vocab = {}
+    width = max((len(doc) for doc in docs), default=0)
+    matrix = np.full((len(docs), max(width, 1)), -1, dtype=np.int64)
+    for row, doc in enumerate(docs):
+        matrix[row, :len(doc)] = [vocab.setdefault(word, len(vocab)) for word in doc]
+    return matrix, vocab
+
+
+def _lexicon_table(vocab, lexicon):
+    # One slot per vocabulary id plus a trailing zero that padding (-1) indexes
+    table = np.zeros(len(vocab) + 1, dtype=np.int64)
+    table[:-1] = [word in lexicon for word in vocab]
+    return table
+
+
+def _aspect_hit_table(vocab, lexicon):
+    # Keyword hits per aspect for every vocabulary id, plus a zero padding row
+    columns = {aspect: column for column, aspect in enumerate(lexicon.aspects)}
+    table = np.zeros((len(vocab) + 1, len(columns)), dtype=np.int64)
+    for word, word_id in vocab.items():
+        for aspect in lexicon.matcher.match(word):
+            table[word_id, columns[aspect]] += 1
+    return table
+
+
+def _window_votes(words, lexicon):
+    # +1/-1/0 sentiment of the ASPECT_WINDOW neighbourhood of each position
+    positive = lexicon.aspect_positive
+    negative = lexicon.aspect_negative
+    pos_hits = [0]
+    neg_hits = [0]
+    for word in words:
+        pos_hits.append(pos_hits[-1] + (word in positive))
+        neg_hits.append(neg_hits[-1] + (word in negative))
+
+    votes = []
+    for position in range(len(words)):
+        lo = max(0, position - ASPECT_WINDOW)
+        hi = min(len(words), position + ASPECT_WINDOW + 1)
+        balance = (pos_hits[hi] - pos_hits[lo]) - (neg_hits[hi] - neg_hits[lo])
+        votes.append((balance > 0) - (balance < 0))
+    return votes
 
 
 # Create a singleton instance of the model
 _model = None
+_model_lock = threading.Lock()
+
+# Available sentiment backends by name; each value builds a SentimentBackend
+BACKENDS = {
+    "mock": MockBertModel,
+}
+
+
+def register_backend(name, factory):
+    """
+    Make a sentiment backend selectable through SENTIMENT_BACKEND
+    
+    Args:
+        name (str): Backend name, also folded into analyzer_version()
+        factory (callable): Returns an object implementing SentimentBackend
+    """
+    BACKENDS[name] = factory
+
 
 def get_model():
     global _model
     if _model is None:
-        try:
-            # In a real implementation, load a pre-trained BERT model
-            # For this demo, we'll use our mock implementation
-            _model = MockBertModel()
-            logger.info("BERT model initialized successfully")
-        except Exception as e:
-            logger.error(f"Error initializing BERT model: {e}")
-            # Fallback to a very simple model if there's an error
-            _model = MockBertModel()
+        with _model_lock:
+            if _model is None:
+                try:
+                    # In a real implementation, load a pre-trained BERT model
+                    # For this demo, the mock implementation is the default
+                    _model = BACKENDS[SENTIMENT_BACKEND]()
+                    logger.info(f"Sentiment backend '{_model.name}' initialized successfully")
+                except Exception as e:
+                    logger.error(f"Error initializing sentiment backend '{SENTIMENT_BACKEND}': {e}")
+                    # Fallback to a very simple model if there's an error
+                    _model = MockBertModel()
     return _model
 
 
+def warmup():
+    """
+    Initialize the analyzer ahead of the first request
+    
+    Loads the model and its bundled resources and runs one analysis so the
+    first real submission does not pay for initialization.
+    """
+    started = time.perf_counter()
+    model = get_model()
+    model.extract_aspects_batch([model.tokenize("The lectures were good")])
+    logger.info(f"Text analyzer warmed up in {time.perf_counter() - started:.3f}s")
+
+
+def analyzer_version():
+    """Return the version string identifying the current analyzer's output"""
+    # Editing the lexicon file changes results, so its version (including
+    # the content hash) is part of ours
+    version = f"{ANALYZER_VERSION}.{get_lexicon().version}"
+    backend = get_model().name
+    if backend != MockBertModel.name:
+        # Other backends score differently, so their results are versioned apart
+        version = f"{version}-{backend}"
+    if len(version) > ANALYZER_VERSION_MAX_LENGTH:
+        # Long lexicon versions or backend names are shortened but stay distinct
+        digest = hashlib.sha256(version.encode('utf-8')).hexdigest()[:8]
+        version = f"{version[:ANALYZER_VERSION_MAX_LENGTH - 9]}~{digest}"
+    return version
+
+
+def normalize_text(text):
+    """
+    Normalize feedback text for result caching
+    
+    Preprocessing lowercases the text and tokenizes on whitespace, so texts
+    that differ only in case or spacing always produce the same analysis.
+    """
+    return ' '.join(text.lower().split())
+
+
+class AnalysisCache:
+    """
+    Bounded LRU cache of analysis results keyed by analyzer version and
+    normalized text, with hit/miss/eviction counters
+    """
+
+    def __init__(self, max_size=ANALYSIS_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return copy.deepcopy(result)
+
+    def put(self, key, result):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = copy.deepcopy(result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def resize(self, max_size):
+        with self._lock:
+            self.max_size = max_size
+            while len(self._entries) > max(max_size, 0):
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'analyzer_version': analyzer_version(),
+                'max_size': self.max_size,
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+_cache = AnalysisCache()
+
+
+def cache_stats():
+    """Return hit, miss and eviction counters of the analysis result cache"""
+    return _cache.stats()
+
+
+def configure_cache(max_size):
+    """Change the analysis result cache size limit, evicting as needed"""
+    _cache.resize(max_size)
+
+
+def clear_cache():
+    """Drop all cached analysis results and reset the counters"""
+    _cache.clear()
+
+
 def analyze_text(text):
     """
     Analyze text feedback and return sentiment score and label
@@ -191,19 +708,8 @@ def analyze_text(text):
     Returns:
         tuple: (sentiment_score, sentiment_label)
     """
-    # Lazily load NLTK resources when needed
-    ensure_nltk_resources()
-    
-    if not text or len(text.strip()) == 0:
-        return 0.0, "neutral"  # Default for empty text
-    
-    try:
-        model = get_model()
-        score, label = model.predict_sentiment(text)
-        return score, label
-    except Exception as e:
-        logger.error(f"Error in sentiment analysis: {e}")
-        return 0.0, "neutral"  # Default in case of error
+    score, label, _ = analyze_full(text)
+    return score, label
 
 
 def aspect_based_analysis(text):
@@ -216,15 +722,255 @@ def aspect_based_analysis(text):
     Returns:
         dict: Aspect-based analysis results
     """
-    # Lazily load NLTK resources when needed
-    ensure_nltk_resources()
+    return analyze_full(text)[2]
+
+
+def analyze_full(text):
+    """
+    Run sentiment and aspect-based analysis over a single preprocessing pass
+    
+    Results are memoized in a bounded LRU cache keyed by the analyzer
+    version and the normalized text.
+    
+    Args:
+        text (str): The feedback text to analyze
+        
+    Returns:
+        tuple: (sentiment_score, sentiment_label, aspects)
+    """
     if not text or len(text.strip()) == 0:
-        return {}  # Empty result for empty text
+        return 0.0, "neutral", {}  # Defaults for empty text
+    
+    # Look up, analyze and cache with the same lexicon
+    with pinned_lexicon():
+        result = cached_result(text)
+        if result is not None:
+            return result
+        
+        result, ok = compute_analysis(text)
+        if ok:
+            # Failed analyses are not cached so they are retried next time
+            cache_result(text, result)
+        return result
+
+
+def cached_result(text):
+    """Return the cached (score, label, aspects) for text, or None on a miss"""
+    return _cache.get((analyzer_version(), normalize_text(text)))
+
+
+def cache_result(text, result):
+    """Store a (score, label, aspects) result for text in the in-process cache"""
+    _cache.put((analyzer_version(), normalize_text(text)), result)
+
+
+def compute_analysis(text):
+    """
+    Analyze non-empty text without consulting any cache
     
+    Returns:
+        tuple: ((sentiment_score, sentiment_label, aspects), ok) where ok is
+        False if any analysis step failed and defaults were substituted
+    """
+    with pinned_lexicon() as lexicon:
+        scheduler = get_scheduler()
+        if scheduler is not None:
+            # Share one backend call with other requests arriving concurrently;
+            # the lexicon travels along as the dispatcher thread has no pin
+            return scheduler.submit((text, lexicon)).result()
+        return _compute_one(text)
+
+
+def _compute_one(text):
+    model = get_model()
+    if not hasattr(model, 'predict_sentiment_tokens'):
+        return compute_analysis_batch([text])[0]
     try:
-        model = get_model()
-        aspects = model.extract_aspects(text)
-        return aspects
+        tokens = model.tokenize(text)
+    except Exception as e:
+        logger.error(f"Error preprocessing feedback text: {e}")
+        return (0.0, "neutral", {}), False  # Defaults in case of error
+    
+    ok = True
+    try:
+        score, label = model.predict_sentiment_tokens(tokens)
+    except Exception as e:
+        logger.error(f"Error in sentiment analysis: {e}")
+        score, label = 0.0, "neutral"
+        ok = False
+    
+    try:
+        aspects = model.extract_aspects_tokens(tokens)
     except Exception as e:
         logger.error(f"Error in aspect-based analysis: {e}")
-        return {}  # Empty result in case of error
+        aspects = {}
+        ok = False
+    
+    return (score, label, aspects), ok
+
+
+def analyze_batch(texts):
+    """
+    Analyze many feedback texts and return their sentiment scores and labels
+    
+    Args:
+        texts (list): The feedback texts to analyze
+        
+    Returns:
+        list: (sentiment_score, sentiment_label) tuples in input order,
+        identical to calling analyze_text on each text
+    """
+    return _run_batch(texts, 'predict_batch', (0.0, "neutral"), "sentiment analysis")
+
+
+def aspect_batch(texts):
+    """
+    Perform aspect-based sentiment analysis on many feedback texts
+    
+    Args:
+        texts (list): The feedback texts to analyze
+        
+    Returns:
+        list: Aspect-based analysis results in input order, identical to
+        calling aspect_based_analysis on each text
+    """
+    return _run_batch(texts, 'extract_aspects_batch', {}, "aspect-based analysis")
+
+
+def compute_analysis_batch(texts, lexicon=None):
+    """
+    Batch counterpart of compute_analysis, tokenizing each distinct text once
+    
+    Args:
+        texts (list): The feedback texts to analyze
+        lexicon (Lexicon): Lexicon to analyze with (defaults to the pinned or
+            current one); passed explicitly to worker processes
+        
+    Returns:
+        list: ((sentiment_score, sentiment_label, aspects), ok) per text in
+        input order; empty texts get the neutral defaults with ok True
+    """
+    # Sentiment and aspects of every chunk use the same lexicon
+    with pinned_lexicon(lexicon):
+        return _compute_batch(texts)
+
+
+def _compute_batch(texts):
+    model = get_model()
+    docs = _tokenize_unique(model, texts)
+
+    unique_texts = list(docs)
+    outputs = {}
+    for start in range(0, len(unique_texts), BATCH_CHUNK_SIZE):
+        chunk = unique_texts[start:start + BATCH_CHUNK_SIZE]
+        chunk_docs = [docs[text] for text in chunk]
+        try:
+            sentiments = model.predict_batch(chunk_docs)
+            aspects = model.extract_aspects_batch(chunk_docs)
+        except Exception as e:
+            logger.error(f"Error in batch analysis: {e}")
+            continue
+        for text, (score, label), text_aspects in zip(chunk, sentiments, aspects):
+            outputs[text] = (score, label, text_aspects)
+
+    results = []
+    seen = set()
+    for text in texts:
+        if not text or len(text.strip()) == 0:
+            results.append(((0.0, "neutral", {}), True))
+        elif text in outputs:
+            result = copy.deepcopy(outputs[text]) if text in seen else outputs[text]
+            results.append((result, True))
+            seen.add(text)
+        else:
+            results.append(((0.0, "neutral", {}), False))
+    return results
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def get_scheduler():
+    """
+    Return the micro-batching scheduler for single-text analyses
+    
+    Returns:
+        MicroBatchScheduler: Shared scheduler feeding compute_scheduled, or
+        None when MICRO_BATCH_WAIT_MS is 0
+    """
+    global _scheduler
+    if MICRO_BATCH_WAIT_MS <= 0:
+        return None
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = MicroBatchScheduler(compute_scheduled,
+                                                 max_batch_size=MICRO_BATCH_SIZE,
+                                                 max_wait_ms=MICRO_BATCH_WAIT_MS,
+                                                 name="analysis-micro-batch")
+    return _scheduler
+
+
+def compute_scheduled(requests):
+    """
+    Analyze a micro-batch of (text, lexicon) requests, see compute_analysis
+    
+    Requests submitted across a lexicon reload are analyzed per lexicon.
+    
+    Returns:
+        list: ((sentiment_score, sentiment_label, aspects), ok) per request
+    """
+    results = [None] * len(requests)
+    groups = {}  # id(lexicon) -> (lexicon, request indexes)
+    for index, (_, lexicon) in enumerate(requests):
+        groups.setdefault(id(lexicon), (lexicon, []))[1].append(index)
+    for lexicon, indexes in groups.values():
+        computed = compute_analysis_batch([requests[index][0] for index in indexes], lexicon=lexicon)
+        for index, result in zip(indexes, computed):
+            results[index] = result
+    return results
+
+
+def scheduler_stats():
+    """Return micro-batching counters, or None when micro-batching is off"""
+    scheduler = get_scheduler()
+    return scheduler.stats() if scheduler is not None else None
+
+
+def _tokenize_unique(model, texts):
+    # Tokenize each distinct non-empty text once
+    docs = {}
+    for text in texts:
+        if text and len(text.strip()) > 0 and text not in docs:
+            try:
+                docs[text] = model.tokenize(text)
+            except Exception as e:
+                logger.error(f"Error preprocessing feedback text: {e}")
+    return docs
+
+
+def _run_batch(texts, method, default, description):
+    model = get_model()
+    results = [None] * len(texts)
+    docs = _tokenize_unique(model, texts)
+
+    unique_texts = list(docs)
+    outputs = {}
+    for start in range(0, len(unique_texts), BATCH_CHUNK_SIZE):
+        chunk = unique_texts[start:start + BATCH_CHUNK_SIZE]
+        try:
+            chunk_results = getattr(model, method)([docs[text] for text in chunk])
+        except Exception as e:
+            logger.error(f"Error in batch {description}: {e}")
+            continue
+        outputs.update(zip(chunk, chunk_results))
+
+    # Hand every caller its own result object, as the scalar functions do
+    seen = set()
+    for index, text in enumerate(texts):
+        if text in outputs:
+            results[index] = copy.deepcopy(outputs[text]) if text in seen else outputs[text]
+            seen.add(text)
+        else:
+            results[index] = copy.copy(default)
+    return results
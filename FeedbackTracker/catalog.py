@@ -0,0 +1,144 @@
+"""
+In-process cache of the feedback catalog: categories, their questions and a
+category name -> id map
+
+The catalog almost never changes, yet the feedback form, every submission
+and the analytics views used to query it on each request. Each worker keeps
+an immutable snapshot tagged with the version stored in CatalogVersion and
+compares that version (one primary-key lookup) at most every
+CATALOG_CHECK_INTERVAL seconds, reloading when it moved. Code that changes
+categories, questions or courses must call invalidate() after committing,
+which bumps the shared version and drops this worker's copy at once.
+"""
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+from app import db
+from models import Category, Question, CatalogVersion
+from db_utils import upsert_adding
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks of the stored catalog version (0 checks on every use)
+CATALOG_CHECK_INTERVAL = float(os.environ.get("CATALOG_CHECK_INTERVAL", 2.0))
+
+# Id of the single CatalogVersion row
+CATALOG_VERSION_ID = 1
+
+
+@dataclass(frozen=True)
+class CatalogQuestion:
+    id: int
+    category_id: int
+    text: str
+
+
+@dataclass(frozen=True)
+class CatalogCategory:
+    id: int
+    name: str
+    description: str
+    questions: tuple  # CatalogQuestions in id order
+
+
+@dataclass(frozen=True)
+class Catalog:
+    version: int
+    categories: tuple  # CatalogCategories in id order
+    by_id: dict
+    ids_by_name: dict
+
+    def get(self, category_id):
+        """Return the category with the given id (int or form string), or None"""
+        try:
+            return self.by_id.get(int(category_id))
+        except (TypeError, ValueError):
+            return None
+
+    def named(self, name):
+        """Return the category with the given name, or None"""
+        return self.by_id.get(self.ids_by_name.get(name))
+
+    def questions(self, category_id):
+        """Return the questions of a category, empty for unknown ids"""
+        category = self.by_id.get(category_id)
+        return category.questions if category else ()
+
+
+def stored_version():
+    """Return the catalog version all workers compare against"""
+    version = db.session.query(CatalogVersion.version).filter_by(id=CATALOG_VERSION_ID).scalar()
+    return version or 0
+
+
+def load_catalog(version):
+    """Read categories and questions into a Catalog tagged with version"""
+    questions = {}
+    for question in Question.query.order_by(Question.id):
+        questions.setdefault(question.category_id, []).append(
+            CatalogQuestion(id=question.id, category_id=question.category_id, text=question.text))
+
+    categories = tuple(
+        CatalogCategory(id=category.id, name=category.name, description=category.description,
+                        questions=tuple(questions.get(category.id, ())))
+        for category in Category.query.order_by(Category.id))
+    return Catalog(version=version,
+                   categories=categories,
+                   by_id={category.id: category for category in categories},
+                   ids_by_name={category.name: category.id for category in categories})
+
+
+class CatalogCache:
+    """This worker's catalog snapshot and when its version was last checked"""
+
+    def __init__(self):
+        self._catalog = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self.reloads = 0
+
+    def get(self):
+        catalog = self._catalog
+        now = time.monotonic()
+        if catalog is not None and now - self._checked < CATALOG_CHECK_INTERVAL:
+            return catalog
+
+        # Read the version before the rows, so a change committed in between
+        # is picked up again by the next check
+        version = stored_version()
+        with self._lock:
+            # Only newer versions reload: a lagging read replica may report an older one
+            if self._catalog is None or version > self._catalog.version:
+                self._catalog = load_catalog(version)
+                self.reloads += 1
+                logger.info(f"Loaded catalog version {version}: {len(self._catalog.categories)} categories")
+            self._checked = now
+            return self._catalog
+
+    def clear(self):
+        with self._lock:
+            self._catalog = None
+
+
+_cache = CatalogCache()
+
+
+def get_catalog():
+    """Return the current Catalog, reloading it if another worker changed it"""
+    return _cache.get()
+
+
+def invalidate():
+    """
+    Mark the catalog as changed for every worker
+
+    Call after committing changes to categories, questions or courses. The
+    stored version is incremented inside the database and committed, and
+    this worker's copy is dropped so its next use reloads.
+    """
+    upsert_adding(CatalogVersion, [{'id': CATALOG_VERSION_ID, 'version': 1}], ['id'], ['version'])
+    db.session.commit()
+    _cache.clear()
@@ -0,0 +1,64 @@
+"""
+Measure how long `import main` (the gunicorn `main:app` entry point) takes
+and compare it against an import-time budget
+
+Each measurement runs in a fresh interpreter so nothing is cached between
+runs. The slowest modules from `python -X importtime` are listed to show
+where the time goes.
+
+Usage:
+    python check_import_time.py [--budget SECONDS] [--runs N]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+# Default budget for importing main:app, in seconds
+DEFAULT_BUDGET = float(os.environ.get("IMPORT_TIME_BUDGET", 2.0))
+
+MEASURE = "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"
+
+
+def measure_import(runs):
+    """Return the wall-clock import times of main over several fresh interpreters"""
+    timings = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", MEASURE], capture_output=True, text=True, check=True)
+        timings.append(float(output.stdout.strip().splitlines()[-1]))
+    return timings
+
+
+def slowest_modules(limit=10):
+    """Return (cumulative seconds, module) for the slowest imports of main"""
+    output = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                            capture_output=True, text=True, check=True)
+    modules = []
+    for line in output.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules.append((int(cumulative) / 1e6, name.strip()))
+    return sorted(modules, reverse=True)[:limit]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the import time of main:app")
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET, help="allowed seconds")
+    parser.add_argument('--runs', type=int, default=5, help="fresh interpreters to measure")
+    args = parser.parse_args()
+
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    timings = measure_import(args.runs)
+    median = statistics.median(timings)
+
+    print("Slowest imports (cumulative):")
+    for seconds, name in slowest_modules():
+        print(f"  {seconds:7.3f}s  {name}")
+    print(f"import main: median {median:.3f}s over {args.runs} runs (budget {args.budget:.3f}s)")
+
+    if median > args.budget:
+        print("FAIL: import time is over budget")
+        sys.exit(1)
+    print("OK")
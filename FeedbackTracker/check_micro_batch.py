@@ -0,0 +1,65 @@
+"""
+Exercise the micro-batching scheduler end to end with the mock backend
+
+Many threads analyze texts concurrently through compute_analysis() with
+micro-batching enabled; every result must equal the unbatched analysis and
+the backend must have been called far fewer times than there were requests.
+
+Usage:
+    python check_micro_batch.py [--threads N] [--requests N] [--wait-ms MS] [--batch-size N]
+"""
+import argparse
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bert_analysis
+from micro_batch import MicroBatchScheduler
+
+WORDS = ["the", "lectures", "were", "good", "bad", "teacher", "explains", "great",
+         "assignments", "terrible", "library", "lab", "helpful", "exam", "fair", "poor"]
+
+
+def random_texts(count, seed=7):
+    """Return count short pseudo-feedback texts"""
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 20))) for _ in range(count)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check micro-batched analysis against direct analysis")
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--wait-ms', type=float, default=5)
+    parser.add_argument('--batch-size', type=int, default=32)
+    args = parser.parse_args()
+
+    texts = random_texts(args.requests)
+    expected = [bert_analysis.compute_analysis(text) for text in texts]
+
+    # Swap in a scheduler with the requested settings for this run only
+    scheduler = MicroBatchScheduler(bert_analysis.compute_scheduled,
+                                    max_batch_size=args.batch_size,
+                                    max_wait_ms=args.wait_ms)
+    bert_analysis.MICRO_BATCH_WAIT_MS = args.wait_ms
+    bert_analysis._scheduler = scheduler
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        actual = list(pool.map(bert_analysis.compute_analysis, texts))
+    elapsed = time.perf_counter() - started
+    scheduler.close()
+
+    stats = scheduler.stats()
+    mismatches = sum(1 for want, got in zip(expected, actual) if want != got)
+    print(f"{len(texts)} requests from {args.threads} threads in {elapsed:.3f}s")
+    print(f"{stats['batches']} backend batches, average size {stats['average_batch_size']}")
+    print(f"{mismatches} results differ from direct analysis")
+
+    # A single thread never has company, so only concurrent runs must batch
+    unbatched = args.threads > 1 and stats['batches'] >= len(texts)
+    if mismatches or stats['items'] != len(texts) or unbatched:
+        print("FAIL")
+        sys.exit(1)
+    print("OK")
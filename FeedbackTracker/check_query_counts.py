@@ -0,0 +1,141 @@
+"""
+Check that the list and detail pages run a bounded number of SQL queries
+
+A scratch SQLite database is seeded through the real routes with a few
+feedback submissions, every page is rendered and its queries counted, then
+more feedback is submitted and the pages are counted again. A page fails if
+it exceeds its budget or if its query count grows with the number of rows
+it shows (an N+1 lazy load in the view or template).
+
+Usage:
+    python check_query_counts.py [--small N] [--large N]
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+
+# Never touch the configured database: seed a scratch file instead
+_scratch = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+_scratch.close()
+os.environ['DATABASE_URL'] = f"sqlite:///{_scratch.name}"
+
+from sqlalchemy import event
+
+from app import app, db
+from models import User, Category, Feedback, ROLE_STUDENT
+from routes import initialize_database
+
+# Maximum queries per page, including the login user lookup
+QUERY_BUDGETS = {
+    'dashboard_student': 10,
+    'track_feedback': 6,
+    'dashboard_staff': 16,
+    'view_feedback': 10,
+    'feedback_form': 2,  # categories and questions come from the catalog cache
+}
+
+STUDENT = ('querycheck@college.com', 'querycheck')
+STAFF = ('cc@college.com', 'cc123')
+
+
+def login(email, password):
+    client = app.test_client()
+    response = client.post('/login', data={'email': email, 'password': password})
+    if response.status_code != 302:
+        raise RuntimeError(f"Login failed for {email}")
+    return client
+
+
+def submit_feedback(client, rng):
+    """Submit one ratings-only feedback form covering every category"""
+    with app.app_context():
+        form = {'selected_categories': []}
+        for category in Category.query.all():
+            if category.name != 'Other':
+                form['selected_categories'].append(str(category.id))
+            for question in category.questions:
+                form[f'rating_{question.id}'] = str(rng.randint(1, 5))
+            form[f'text_{category.id}'] = ''
+    client.post('/feedback/submit', data=form)
+
+
+def count_queries(client, url):
+    """Return (status code, queries run) for one GET request"""
+    queries = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        queries.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        response = client.get(url)
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+    return response.status_code, len(queries)
+
+
+def measure(student, staff):
+    with app.app_context():
+        feedback_id = (Feedback.query.order_by(Feedback.id.desc()).first()).id
+    pages = [
+        ('dashboard_student', student, '/dashboard/student'),
+        ('track_feedback', student, '/feedback/track'),
+        ('dashboard_staff', staff, '/dashboard/staff'),
+        ('view_feedback', student, f'/feedback/view/{feedback_id}'),
+        ('feedback_form', student, '/feedback/submit'),
+    ]
+    counts = {}
+    for name, client, url in pages:
+        status, queries = count_queries(client, url)
+        if status != 200:
+            raise RuntimeError(f"{url} returned {status}")
+        counts[name] = queries
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check per-page SQL query counts")
+    parser.add_argument('--small', type=int, default=2, help="feedback submissions for the first measurement")
+    parser.add_argument('--large', type=int, default=12, help="feedback submissions for the second measurement")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    rng = random.Random(11)
+    try:
+        with app.app_context():
+            initialize_database()
+            student = User(username='querycheck', email=STUDENT[0], role=ROLE_STUDENT,
+                           department='Computer Science', roll_number='QC001')
+            student.set_password(STUDENT[1])
+            db.session.add(student)
+            db.session.commit()
+
+        student_client = login(*STUDENT)
+        staff_client = login(*STAFF)
+
+        for _ in range(args.small):
+            submit_feedback(student_client, rng)
+        small = measure(student_client, staff_client)
+        for _ in range(args.large - args.small):
+            submit_feedback(student_client, rng)
+        large = measure(student_client, staff_client)
+    finally:
+        os.unlink(_scratch.name)
+
+    failures = []
+    print(f"{'page':<26}{args.small:>8}{args.large:>8}{'budget':>8}")
+    for name, budget in QUERY_BUDGETS.items():
+        print(f"{name:<26}{small[name]:>8}{large[name]:>8}{budget:>8}")
+        if large[name] > budget:
+            failures.append(f"{name} ran {large[name]} queries (budget {budget})")
+        if large[name] > small[name]:
+            failures.append(f"{name} grew from {small[name]} to {large[name]} queries with more rows")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
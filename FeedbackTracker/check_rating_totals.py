@@ -0,0 +1,93 @@
+"""
+Check the rating totals stored on FeedbackItem against the Rating table
+
+Items are walked in id order and their stored rating_sum, rating_count and
+avg_rating compared with the totals of their Rating rows. With --fix the
+differing items are corrected, chunk by chunk, which also backfills items
+created before the columns existed. Exits non-zero if mismatches remain.
+
+Usage:
+    python check_rating_totals.py [--fix] [--chunk-size N]
+"""
+import argparse
+import logging
+import sys
+
+from sqlalchemy import func
+
+from app import app, db
+from models import FeedbackItem, Rating
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def check_rating_totals(fix=False, chunk_size=1000):
+    """
+    Compare (and optionally correct) the stored rating totals
+
+    Returns:
+        tuple: (items checked, items whose totals differed)
+    """
+    checked = 0
+    mismatched = 0
+    last_id = 0
+    while True:
+        items = (FeedbackItem.query
+                 .filter(FeedbackItem.id > last_id)
+                 .order_by(FeedbackItem.id)
+                 .limit(chunk_size)
+                 .all())
+        if not items:
+            break
+
+        item_ids = [item.id for item in items]
+        totals = {item_id: (int(rating_sum), rating_count)
+                  for item_id, rating_sum, rating_count in
+                  db.session.query(Rating.feedback_item_id,
+                                   func.sum(Rating.rating_value),
+                                   func.count(Rating.id))
+                  .filter(Rating.feedback_item_id.in_(item_ids))
+                  .group_by(Rating.feedback_item_id)}
+
+        for item in items:
+            rating_sum, rating_count = totals.get(item.id, (0, 0))
+            expected_avg = rating_sum / rating_count if rating_count else None
+            if (item.rating_sum, item.rating_count) == (rating_sum, rating_count) and \
+                    (item.avg_rating is None) == (expected_avg is None) and \
+                    (expected_avg is None or abs(item.avg_rating - expected_avg) < 1e-9):
+                continue
+            mismatched += 1
+            logger.warning(f"FeedbackItem #{item.id}: stored {item.rating_sum}/{item.rating_count}, "
+                           f"ratings {rating_sum}/{rating_count}")
+            if fix:
+                item.set_rating_totals(rating_sum, rating_count)
+
+        if fix:
+            db.session.commit()
+        else:
+            db.session.rollback()
+
+        checked += len(items)
+        last_id = item_ids[-1]
+        logger.info(f"Checked {checked} feedback items (up to #{last_id})")
+
+    return checked, mismatched
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check stored FeedbackItem rating totals against Rating")
+    parser.add_argument('--fix', action='store_true', help="correct (or backfill) differing items")
+    parser.add_argument('--chunk-size', type=int, default=1000, help="items per step")
+    args = parser.parse_args()
+
+    with app.app_context():
+        checked, mismatched = check_rating_totals(fix=args.fix, chunk_size=args.chunk_size)
+        if not mismatched:
+            logger.info(f"All {checked} feedback items have consistent rating totals")
+        elif args.fix:
+            logger.info(f"Corrected rating totals of {mismatched} of {checked} feedback items")
+        else:
+            logger.error(f"{mismatched} of {checked} feedback items have inconsistent rating totals")
+            sys.exit(1)
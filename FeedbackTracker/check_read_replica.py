@@ -0,0 +1,167 @@
+"""
+Check analytics read routing with two SQLite files standing in for the
+primary and its read replica
+
+The primary is seeded through the real routes and copied into a read-only
+snapshot used as ANALYTICS_DATABASE_URL. More feedback is then submitted to
+the primary only. The analytics views must answer from the snapshot (the
+older counts) without running any query on the primary beyond the login
+user lookup, while submissions keep writing to the primary.
+
+Usage:
+    python check_read_replica.py [--before N] [--after N]
+"""
+import argparse
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+
+# Never touch the configured database: use scratch files for both binds
+_primary = tempfile.NamedTemporaryFile(suffix='.db', delete=False).name
+_replica = tempfile.NamedTemporaryFile(suffix='.db', delete=False).name
+os.environ['DATABASE_URL'] = f"sqlite:///{_primary}"
+os.environ['ANALYTICS_DATABASE_URL'] = f"sqlite:///file:{_replica}?mode=ro&uri=true"
+
+from sqlalchemy import event
+
+from app import app, db
+from models import User, Category, Feedback, ROLE_STUDENT
+from read_replica import ANALYTICS_BIND
+from routes import initialize_database
+
+STUDENT = ('replicacheck@college.com', 'replicacheck')
+STAFF = ('cc@college.com', 'cc123')
+
+# View -> queries it may still run on the primary (Flask-Login's user lookup)
+ANALYTICS_VIEWS = {
+    '/api/feedback/analytics?days=30': 1,
+    '/sentiment_trends?days=30': 1,
+    '/download_report': 1,
+}
+
+
+def login(email, password):
+    client = app.test_client()
+    response = client.post('/login', data={'email': email, 'password': password})
+    if response.status_code != 302:
+        raise RuntimeError(f"Login failed for {email}")
+    return client
+
+
+def submit_feedback(client):
+    with app.app_context():
+        form = {'selected_categories': []}
+        for category in Category.query.all():
+            if category.name != 'Other':
+                form['selected_categories'].append(str(category.id))
+            for question in category.questions:
+                form[f'rating_{question.id}'] = '4'
+            form[f'text_{category.id}'] = ''
+    client.post('/feedback/submit', data=form)
+
+
+def snapshot():
+    """Copy the primary into the replica file with SQLite's online backup"""
+    source = sqlite3.connect(_primary)
+    target = sqlite3.connect(_replica)
+    try:
+        source.backup(target)
+    finally:
+        source.close()
+        target.close()
+
+
+class QueryCounter:
+    """Count statements per bind while the with-block runs"""
+
+    def __init__(self):
+        with app.app_context():
+            self.engines = {'primary': db.engines[None], 'replica': db.engines[ANALYTICS_BIND]}
+        self.counts = {name: 0 for name in self.engines}
+        self._listeners = {name: self._listener(name) for name in self.engines}
+
+    def _listener(self, name):
+        def count(*args):
+            self.counts[name] += 1
+        return count
+
+    def __enter__(self):
+        for name, engine in self.engines.items():
+            self.counts[name] = 0
+            event.listen(engine, 'before_cursor_execute', self._listeners[name])
+        return self
+
+    def __exit__(self, *exc):
+        for name, engine in self.engines.items():
+            event.remove(engine, 'before_cursor_execute', self._listeners[name])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check analytics queries are routed to the replica")
+    parser.add_argument('--before', type=int, default=3, help="submissions included in the snapshot")
+    parser.add_argument('--after', type=int, default=2, help="submissions made on the primary only")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    failures = []
+    try:
+        with app.app_context():
+            initialize_database()
+            student = User(username='replicacheck', email=STUDENT[0], role=ROLE_STUDENT,
+                           department='Computer Science', roll_number='RC001')
+            student.set_password(STUDENT[1])
+            db.session.add(student)
+            db.session.commit()
+
+        student_client = login(*STUDENT)
+        staff_client = login(*STAFF)
+        for _ in range(args.before):
+            submit_feedback(student_client)
+        snapshot()
+
+        counter = QueryCounter()
+        with counter:
+            for _ in range(args.after):
+                submit_feedback(student_client)
+        print(f"submissions: {counter.counts['primary']} primary / {counter.counts['replica']} replica queries")
+        if counter.counts['replica']:
+            failures.append("submissions queried the replica")
+
+        with app.app_context():
+            on_primary = Feedback.query.count()
+        if on_primary != args.before + args.after:
+            failures.append(f"primary holds {on_primary} feedback rows, expected {args.before + args.after}")
+
+        for url, allowed in ANALYTICS_VIEWS.items():
+            with counter:
+                response = staff_client.get(url)
+            print(f"{url}: HTTP {response.status_code}, "
+                  f"{counter.counts['primary']} primary / {counter.counts['replica']} replica queries")
+            if response.status_code != 200:
+                failures.append(f"{url} returned {response.status_code}")
+            if counter.counts['primary'] > allowed:
+                failures.append(f"{url} ran {counter.counts['primary']} queries on the primary")
+            if not counter.counts['replica']:
+                failures.append(f"{url} did not query the replica")
+
+        # The report lists one row per item of the snapshot's feedback only
+        report = staff_client.get('/download_report').get_data(as_text=True)
+        reported = {line.split(',')[0] for line in report.splitlines()[1:] if line}
+        print(f"download_report covers {len(reported)} feedback (snapshot has {args.before})")
+        if len(reported) != args.before:
+            failures.append("download_report did not read the snapshot")
+    finally:
+        with app.app_context():
+            db.session.remove()
+            for engine in db.engines.values():
+                engine.dispose()
+        for path in (_primary, _replica):
+            for suffix in ('', '-wal', '-shm', '-journal'):
+                if os.path.exists(path + suffix):
+                    os.unlink(path + suffix)
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,106 @@
+"""
+Check the batched writes of submit_feedback on a scratch SQLite database
+
+Feedback is submitted through the real route for a few form shapes and the
+stored rows are compared with what the form asked for:
+
+* every category rated, with text (one item per category, every rating,
+  theme counters for the text)
+* only "Other" selected and left empty (the Feedback is stored without
+  items, as before the batched inserts)
+
+Usage:
+    python check_submit_feedback.py
+"""
+import logging
+import os
+import sys
+import tempfile
+
+# Never touch the configured database: use a scratch file instead
+_scratch = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+_scratch.close()
+os.environ['DATABASE_URL'] = f"sqlite:///{_scratch.name}"
+
+from app import app, db
+from models import User, Category, Feedback, FeedbackItem, FeedbackTheme, Rating, ROLE_STUDENT
+from routes import initialize_database
+
+STUDENT = ('submitcheck@college.com', 'submitcheck')
+THEME_TEXT = 'The lab work is difficult and the notes are confusing'
+
+
+def login(email, password):
+    client = app.test_client()
+    response = client.post('/login', data={'email': email, 'password': password})
+    if response.status_code != 302:
+        raise RuntimeError(f"Login failed for {email}")
+    return client
+
+
+def stored_counts(feedback_id):
+    """Return (items, ratings, theme counters) stored for a feedback"""
+    items = FeedbackItem.query.filter_by(feedback_id=feedback_id)
+    item_ids = [item.id for item in items]
+    return (len(item_ids),
+            Rating.query.filter(Rating.feedback_item_id.in_(item_ids)).count(),
+            FeedbackTheme.query.filter(FeedbackTheme.feedback_item_id.in_(item_ids)).count())
+
+
+def check_submission(client, name, form, expected):
+    """Submit form and compare the stored counts of the new feedback with expected"""
+    response = client.post('/feedback/submit', data=form)
+    with app.app_context():
+        feedback = Feedback.query.order_by(Feedback.id.desc()).first()
+        counts = stored_counts(feedback.id) if feedback else None
+        total = Feedback.query.count()
+    print(f"{name}: HTTP {response.status_code}, {total} feedback, (items, ratings, themes) {counts}")
+
+    failures = []
+    if response.status_code != 302 or 'dashboard' not in response.headers.get('Location', ''):
+        failures.append(f"{name}: submission was not accepted")
+    if counts != expected:
+        failures.append(f"{name}: stored {counts}, expected {expected}")
+    return failures
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    failures = []
+    try:
+        with app.app_context():
+            initialize_database()
+            student = User(username='submitcheck', email=STUDENT[0], role=ROLE_STUDENT,
+                           department='Computer Science', roll_number='SC001')
+            student.set_password(STUDENT[1])
+            db.session.add(student)
+            db.session.commit()
+
+            categories = Category.query.order_by(Category.id).all()
+            rated = [category for category in categories if category.name != 'Other']
+            other = next(category for category in categories if category.name == 'Other')
+            full_form = {'selected_categories': [str(category.id) for category in rated]}
+            question_count = 0
+            for category in rated:
+                for question in category.questions:
+                    full_form[f'rating_{question.id}'] = '4'
+                    question_count += 1
+                full_form[f'text_{category.id}'] = THEME_TEXT if category is rated[0] else ''
+            full_form[f'text_{other.id}'] = ''
+
+        client = login(*STUDENT)
+        failures += check_submission(client, 'all categories', full_form, (len(rated), question_count, 2))
+        failures += check_submission(client, 'empty Other only',
+                                     {'selected_categories': [str(other.id)], f'text_{other.id}': ''},
+                                     (0, 0, 0))
+    finally:
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        for suffix in ('', '-wal', '-shm', '-journal'):
+            if os.path.exists(_scratch.name + suffix):
+                os.unlink(_scratch.name + suffix)
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
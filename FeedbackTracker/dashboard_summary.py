@@ -0,0 +1,111 @@
+"""
+Aggregates for the staff dashboard, fetched in a single round trip
+
+All scalar counts and grouped aggregates of dashboard_staff are selected as
+(kind, key, value) rows of one UNION ALL statement instead of one query
+each, which matters most on PostgreSQL where every round trip pays network
+latency.
+"""
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from sqlalchemy import Float, String, cast, func, literal, null, select, union_all
+
+from app import db
+from models import (
+    Category, DailyRollup, Feedback, FeedbackItem, Response, User,
+    ANALYSIS_PENDING, ANALYSIS_PROCESSING, ROLLUP_ALL_QUESTIONS, STATUS_PENDING
+)
+from rollups import rollup_average
+
+
+@dataclass
+class DashboardSummary:
+    """Counts and grouped aggregates shown on the staff dashboard"""
+    total_feedback: int = 0
+    pending_count: int = 0
+    pending_analysis: int = 0
+    unread_messages: int = 0
+    category_counts: list = field(default_factory=list)  # (category name, item count)
+    avg_ratings: list = field(default_factory=list)  # (category name, average rating)
+    sentiment_summary: list = field(default_factory=list)  # (sentiment label, item count)
+
+
+def _scalar(kind, value, *criteria, source=None):
+    # One (kind, NULL, value) row
+    stmt = select(literal(kind).label('kind'), cast(null(), String).label('key'),
+                  cast(value, Float).label('value'))
+    if source is not None:
+        stmt = stmt.select_from(source)
+    return stmt.where(*criteria)
+
+
+def _grouped(kind, key, value, from_day, having=None, *criteria):
+    # (kind, key, value) rows over the per-item rollup rows from from_day on
+    stmt = (select(literal(kind).label('kind'), cast(key, String).label('key'),
+                   cast(value, Float).label('value'))
+            .select_from(DailyRollup)
+            .join(Category, DailyRollup.category_id == Category.id)
+            .where(DailyRollup.question_id == ROLLUP_ALL_QUESTIONS,
+                   DailyRollup.day >= from_day, *criteria)
+            .group_by(key))
+    if having is not None:
+        stmt = stmt.having(having)
+    return stmt
+
+
+def staff_dashboard_statement(user_id, from_date):
+    """
+    Return the UNION ALL statement selecting every (kind, key, value) row of
+    the dashboard, see staff_dashboard_summary
+    """
+    from_day = from_date.date() if isinstance(from_date, datetime) else from_date
+
+    return union_all(
+        _scalar('total_feedback', func.count(Feedback.id),
+                Feedback.submission_date >= from_date),
+        _scalar('pending_count', func.count(Response.id),
+                Response.status == STATUS_PENDING,
+                Response.response_date >= from_date),
+        _scalar('pending_analysis', func.count(FeedbackItem.id),
+                FeedbackItem.analysis_status.in_((ANALYSIS_PENDING, ANALYSIS_PROCESSING)),
+                Feedback.submission_date >= from_date,
+                source=FeedbackItem.__table__.join(Feedback.__table__, FeedbackItem.feedback_id == Feedback.id)),
+        _scalar('unread_messages', User.unread_message_count,
+                User.id == user_id),
+        _grouped('category_count', Category.name, func.sum(DailyRollup.item_count), from_day,
+                 func.sum(DailyRollup.item_count) > 0),
+        _grouped('avg_rating', Category.name, rollup_average(), from_day,
+                 func.sum(DailyRollup.rating_count) > 0),
+        _grouped('sentiment', DailyRollup.sentiment_label, func.sum(DailyRollup.item_count), from_day,
+                 func.sum(DailyRollup.item_count) > 0,
+                 DailyRollup.sentiment_label != ''),
+    )
+
+
+def staff_dashboard_summary(user_id, from_date):
+    """
+    Fetch the dashboard aggregates with one query
+
+    Args:
+        user_id (int): Staff member viewing the dashboard (for unread messages)
+        from_date (datetime): Start of the dashboard window; rollup-based
+            aggregates cover whole days from its date on
+
+    Returns:
+        DashboardSummary: The aggregates
+    """
+    statement = staff_dashboard_statement(user_id, from_date)
+    summary = DashboardSummary()
+    grouped = {'category_count': summary.category_counts,
+               'avg_rating': summary.avg_ratings,
+               'sentiment': summary.sentiment_summary}
+    for kind, key, value in db.session.execute(statement):
+        if kind in grouped:
+            grouped[kind].append((key, value if kind == 'avg_rating' else int(value)))
+        else:
+            setattr(summary, kind, int(value or 0))
+
+    for rows in grouped.values():
+        rows.sort(key=lambda row: row[0])
+    return summary
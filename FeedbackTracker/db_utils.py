@@ -0,0 +1,131 @@
+"""
+Small database helpers shared by the analysis, reporting and listing code
+"""
+import base64
+import logging
+from datetime import datetime
+
+from sqlalchemy import and_, insert, or_, update
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+
+logger = logging.getLogger(__name__)
+
+
+def dialect_insert(model):
+    """Return an INSERT construct for model that supports ON CONFLICT clauses
+    on SQLite and PostgreSQL, or None on other databases"""
+    dialect = db.session.get_bind(mapper=model.__mapper__).dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+        return pg_insert(model)
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+        return sqlite_insert(model)
+    return None
+
+
+def insert_ignoring_conflicts(model, rows, index_elements):
+    """
+    Insert rows, silently skipping any that violate the unique key made of
+    index_elements (e.g. because another worker inserted them first)
+    """
+    if not rows:
+        return
+
+    stmt = dialect_insert(model)
+    if stmt is not None:
+        db.session.execute(stmt.on_conflict_do_nothing(index_elements=index_elements), rows)
+        return
+
+    # Portable fallback: one savepoint per row
+    for row in rows:
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(model), [row])
+        except IntegrityError:
+            logger.debug(f"Skipping duplicate {model.__tablename__} row")
+
+
+def upsert_adding(model, rows, index_elements, counters):
+    """
+    Insert rows, or add their counter values onto the existing row with the
+    same unique key made of index_elements
+
+    The addition happens inside the database (ON CONFLICT DO UPDATE), so
+    concurrent writers never lose each other's increments.
+    """
+    if not rows:
+        return
+
+    stmt = dialect_insert(model)
+    if stmt is not None:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=index_elements,
+            set_={name: getattr(model, name) + getattr(stmt.excluded, name) for name in counters}
+        )
+        db.session.execute(stmt, rows)
+        return
+
+    # Portable fallback: update in place, insert when nothing matched
+    for row in rows:
+        key = [getattr(model, name) == row[name] for name in index_elements]
+        increments = {name: getattr(model, name) + row[name] for name in counters}
+        if db.session.execute(update(model).where(*key).values(increments)).rowcount == 0:
+            db.session.execute(insert(model), [row])
+
+
+def encode_cursor(moment, row_id):
+    """Return an opaque, URL-safe page cursor for the row (moment, row_id); moment may be None"""
+    payload = f"{moment.isoformat() if moment is not None else ''}|{row_id}".encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return the (moment, row_id) of a page cursor, raising ValueError if it is malformed"""
+    payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+    moment, row_id = payload.split('|')
+    return (datetime.fromisoformat(moment) if moment else None), int(row_id)
+
+
+def keyset_page(query, date_column, id_column, cursor=None, page_size=25):
+    """
+    Return one page of query, newest first, using keyset pagination on
+    (date_column, id_column)
+
+    The next page starts strictly after the last row of this one, so every
+    page is a bounded index range scan however deep the caller pages (an
+    index on the filter columns plus date_column keeps it that way). Rows
+    with a NULL date_column (legacy or imported rows) come last, by id.
+
+    Args:
+        query (Query): Filtered query of the listed model
+        date_column: Timestamp column rows are ordered by
+        id_column: Primary key, breaking ties between equal timestamps
+        cursor (str): next_cursor of the previous page (None for the first)
+        page_size (int): Rows per page
+
+    Returns:
+        tuple: (rows, next_cursor), next_cursor being None on the last page
+
+    Raises:
+        ValueError: If cursor is malformed
+    """
+    if cursor:
+        moment, row_id = decode_cursor(cursor)
+        if moment is None:
+            # Already inside the trailing NULL-dated rows
+            query = query.filter(date_column.is_(None), id_column < row_id)
+        else:
+            query = query.filter(or_(date_column < moment,
+                                     and_(date_column == moment, id_column < row_id),
+                                     date_column.is_(None)))
+
+    rows = query.order_by(date_column.desc().nulls_last(), id_column.desc()).limit(page_size + 1).all()
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, date_column.key), getattr(last, id_column.key))
+    return rows, next_cursor
@@ -0,0 +1,178 @@
+"""
+Print query plans for the hot queries of routes.py
+
+Each query is built the same way the route builds it and run through
+EXPLAIN QUERY PLAN on SQLite or EXPLAIN on PostgreSQL against the configured
+database (DATABASE_URL). Plans that still scan a whole table are flagged and
+make the script exit with status 1, so missing indexes show up after
+migrations or model changes.
+
+Usage:
+    python explain_queries.py [--query NAME] [--user-id N] [--department NAME]
+"""
+import argparse
+import re
+import sys
+from datetime import datetime, timedelta
+
+from sqlalchemy import Float, cast, func
+
+from app import app, db
+from models import (
+    User, Category, Feedback, FeedbackItem, Response, DirectMessage,
+    ROLE_STUDENT, STATUS_PENDING
+)
+from dashboard_summary import staff_dashboard_statement
+
+# Plan lines that mean a full table scan (SQLite, PostgreSQL)
+FULL_SCAN = re.compile(r'^\s*(?:[-|`]*\s*)?SCAN (?!.*USING)|Seq Scan on')
+
+
+def hot_queries(user_id, department, days=30, page_size=25):
+    """
+    Return (name, query) pairs mirroring the hot queries of routes.py
+
+    Args:
+        user_id (int): User the per-user queries run for
+        department (str): Department for the department filters
+        days (int): Dashboard date window
+        page_size (int): Rows per keyset-paginated list page
+    """
+    from_date = datetime.utcnow() - timedelta(days=days)
+    today = datetime.utcnow().date()
+    category_avg = (cast(func.sum(FeedbackItem.rating_sum), Float) /
+                    func.nullif(func.sum(FeedbackItem.rating_count), 0))
+
+    return [
+        # Counts, unread messages and the rollup-based aggregates in one statement
+        ('dashboard_staff.summary',
+         staff_dashboard_statement(user_id, from_date)),
+        ('dashboard_staff.today_feedback',
+         Feedback.query.filter(Feedback.submission_day == today)
+         .order_by(Feedback.submission_date.desc())),
+        ('dashboard_staff.low_ratings',
+         Feedback.query
+         .filter(Feedback.id.in_(
+             db.session.query(FeedbackItem.feedback_id)
+             .filter(FeedbackItem.feedback_id.in_(
+                 db.session.query(Feedback.id).filter(Feedback.submission_date >= from_date)))
+             .group_by(FeedbackItem.feedback_id)
+             .having(func.sum(FeedbackItem.rating_count) > 0)
+             .having(func.sum(FeedbackItem.rating_sum) <= 2 * func.sum(FeedbackItem.rating_count))))
+         .order_by(Feedback.submission_date.desc())
+         .limit(5)),
+        ('dashboard_staff.attention_needed',
+         Feedback.query.join(Response, Feedback.id == Response.feedback_id)
+         .filter(Response.status == STATUS_PENDING)
+         .filter(Response.staff_id == user_id)
+         .order_by(Feedback.submission_date.desc())),
+        ('dashboard_staff.received_messages',
+         DirectMessage.query.filter_by(recipient_id=user_id)
+         .order_by(DirectMessage.sent_date.desc()).limit(10)),
+        ('dashboard_staff.sent_messages',
+         DirectMessage.query.filter_by(sender_id=user_id)
+         .order_by(DirectMessage.sent_date.desc()).limit(10)),
+        ('reconcile_unread_counts.unread_count',
+         DirectMessage.query.filter_by(recipient_id=user_id, is_read=False)
+         .with_entities(func.count(DirectMessage.id))),
+        ('dashboard_student.recent_feedback',
+         Feedback.query.filter_by(student_id=user_id)
+         .order_by(Feedback.submission_date.desc()).limit(5)),
+        ('dashboard_student.pending_feedback',
+         Feedback.query.join(Response, Feedback.id == Response.feedback_id)
+         .filter(Feedback.student_id == user_id)
+         .filter(Response.status == STATUS_PENDING)),
+        ('track_feedback.page',
+         Feedback.query.filter_by(student_id=user_id)
+         .order_by(Feedback.submission_date.desc().nulls_last(), Feedback.id.desc()).limit(page_size + 1)),
+        ('direct_message.received_page',
+         DirectMessage.query.filter_by(recipient_id=user_id)
+         .order_by(DirectMessage.sent_date.desc().nulls_last(), DirectMessage.id.desc()).limit(page_size + 1)),
+        ('view_feedback.items',
+         FeedbackItem.query.filter_by(feedback_id=1)),
+        ('view_feedback.responses',
+         Response.query.filter_by(feedback_id=1).order_by(Response.response_date)),
+        ('download_report.department_feedback',
+         Feedback.query.join(User, Feedback.student_id == User.id)
+         .filter(User.department == department)
+         .order_by(Feedback.submission_date.desc())),
+        ('download_report.forwarded_feedback',
+         Feedback.query.join(Response, Feedback.id == Response.feedback_id)
+         .filter(Response.forwarded_to == user_id)
+         .order_by(Feedback.submission_date.desc())),
+        ('feedback_analytics.feedback_trend',
+         db.session.query(Feedback.submission_week, func.count(Feedback.id))
+         .filter(Feedback.submission_date >= from_date)
+         .group_by(Feedback.submission_week)
+         .order_by(Feedback.submission_week)),
+        ('areas_of_improvement.low_rated_categories',
+         db.session.query(Category.name, category_avg.label('avg_rating'))
+         .join(FeedbackItem, Category.id == FeedbackItem.category_id)
+         .join(Feedback, FeedbackItem.feedback_id == Feedback.id)
+         .join(User, Feedback.student_id == User.id)
+         .filter(Feedback.submission_date >= from_date)
+         .filter(User.department == department)
+         .group_by(Category.name)
+         .having(func.sum(FeedbackItem.rating_count) > 0)
+         .order_by(category_avg.asc())
+         .limit(3)),
+        ('manage_students.page',
+         User.query.filter_by(role=ROLE_STUDENT, department=department)
+         .order_by(User.date_joined.desc().nulls_last(), User.id.desc()).limit(page_size + 1)),
+        ('category_analysis.items',
+         FeedbackItem.query.filter_by(category_id=1)),
+    ]
+
+
+def explain(query):
+    """Return the plan lines of a query (ORM Query or Core statement) on the current database"""
+    statement = getattr(query, 'statement', query)
+    # Expand IN (...) parameters, which are otherwise only filled in at execution
+    compiled = statement.compile(dialect=db.engine.dialect, compile_kwargs={'render_postcompile': True})
+    if compiled.positional:
+        params = tuple(compiled.params[name] for name in compiled.positiontup)
+    else:
+        params = compiled.params
+
+    if db.engine.dialect.name == 'sqlite':
+        sql = f"EXPLAIN QUERY PLAN {compiled}"
+        rows = db.session.connection().exec_driver_sql(sql, params).fetchall()
+        # (id, parent, notused, detail): indent each step under its parent
+        depth = {0: 0}
+        lines = []
+        for node_id, parent, _, detail in rows:
+            depth[node_id] = depth.get(parent, 0) + 1
+            lines.append('  ' * (depth[node_id] - 1) + detail)
+        return lines
+
+    sql = f"EXPLAIN {compiled}"
+    return [row[0] for row in db.session.connection().exec_driver_sql(sql, params).fetchall()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Print query plans for the hot queries of routes.py")
+    parser.add_argument('--query', help="only explain queries whose name contains this text")
+    parser.add_argument('--user-id', type=int, default=1)
+    parser.add_argument('--department', default='Computer Science')
+    args = parser.parse_args()
+
+    with app.app_context():
+        print(f"Database: {db.engine.url.render_as_string(hide_password=True)} ({db.engine.dialect.name})")
+        full_scans = []
+        for name, query in hot_queries(args.user_id, args.department, page_size=app.config['PAGE_SIZE']):
+            if args.query and args.query not in name:
+                continue
+            print(f"\n== {name}")
+            for line in explain(query):
+                flag = ''
+                if FULL_SCAN.search(line):
+                    flag = '   <-- full scan'
+                    full_scans.append(name)
+                print(f"  {line}{flag}")
+
+        print(f"\n{len(set(full_scans))} queries with full table scans")
+        for name in sorted(set(full_scans)):
+            print(f"  {name}")
+
+    # Non-zero exit so CI fails when a hot query loses its index
+    sys.exit(1 if full_scans else 0)
@@ -0,0 +1,91 @@
+"""
+Improvement-theme keyword counters for feedback text
+
+Keyword hits are counted once per FeedbackItem when feedback is submitted
+and stored in the feedback_theme table, so suggestion endpoints only sum
+small per-item counters instead of rescanning all feedback text.
+"""
+# Keywords for common issues and the corresponding suggestions
+# This would use more sophisticated AI in a production system
+IMPROVEMENT_THEMES = {
+    'difficult': {
+        'theme': 'Complexity',
+        'suggestion': 'Consider simplifying complex topics and providing more scaffolded learning materials.'
+    },
+    'confusing': {
+        'theme': 'Clarity',
+        'suggestion': 'Review explanations for clarity and provide more visual aids or examples.'
+    },
+    'slow': {
+        'theme': 'Pacing',
+        'suggestion': 'Evaluate the pacing of instruction and consider offering additional resources for self-paced learning.'
+    },
+    'boring': {
+        'theme': 'Engagement',
+        'suggestion': 'Incorporate more interactive activities and real-world applications to increase engagement to increase engagement.'
+    },
+    'outdated': {
+        'theme': 'Relevance',
+        'suggestion': 'Update materials with current industry practices and technologies.'
+    },
+    'hard': {
+        'theme': 'Difficulty',
+        'suggestion': 'Consider providing additional practice opportunities and more graduated difficulty levels.'
+    },
+    'too much': {
+        'theme': 'Workload',
+        'suggestion': 'Review the workload and consider adjusting assignment deadlines or requirements.'
+    }
+}
+
+
+def count_themes(text):
+    """
+    Count improvement-theme keyword occurrences in feedback text
+
+    Args:
+        text (str): The feedback text
+
+    Returns:
+        dict: keyword -> number of (case-insensitive) occurrences, only for
+        keywords that occur
+    """
+    if not text:
+        return {}
+    text = text.lower()
+    counts = {}
+    for keyword in IMPROVEMENT_THEMES:
+        count = text.count(keyword)
+        if count:
+            counts[keyword] = count
+    return counts
+
+
+def theme_rows(item_id, text):
+    """Return the FeedbackTheme column values for a FeedbackItem's text"""
+    return [{'feedback_item_id': item_id, 'keyword': keyword, 'hit_count': count}
+            for keyword, count in count_themes(text).items()]
+
+
+def theme_suggestions(theme_counts):
+    """
+    Turn summed keyword counts into suggestions, most relevant first
+
+    Args:
+        theme_counts (dict): keyword -> total hits
+
+    Returns:
+        list: Suggestion dicts with theme, suggestion and relevance
+    """
+    suggestions = []
+    for keyword, data in IMPROVEMENT_THEMES.items():
+        count = int(theme_counts.get(keyword) or 0)
+        if count:
+            suggestions.append({
+                'theme': data['theme'],
+                'suggestion': data['suggestion'],
+                'relevance': count
+            })
+
+    # Sort by relevance (occurrence count)
+    return sorted(suggestions, key=lambda x: x['relevance'], reverse=True)
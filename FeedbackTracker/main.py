@@ -4,12 +4,26 @@ import routes  # noqa: F401
 import logging
 import os
 import sys
+import analysis_queue
+from bert_analysis import warmup
 from routes import initialize_database
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# The analyzer initializes lazily on first use unless warmup is requested
+if app.config.get("ANALYSIS_WARMUP"):
+    warmup()
+
+# Resume background analysis left pending by a previous process
+if analysis_queue.is_background_mode():
+    with app.app_context():
+        try:
+            analysis_queue.enqueue_pending()
+        except Exception as e:
+            logger.error(f"Error queueing pending feedback analysis: {e}")
+
 def main():
     logger.info("Starting Feedback Management System")
     logger.info(f"Python version: {sys.version}")
@@ -0,0 +1,124 @@
+"""
+Micro-batching scheduler for CPU-bound model inference
+
+Concurrent callers each submit a single item and get a Future back; a
+dispatcher thread collects submissions for up to max_wait_ms or until
+max_batch_size items are waiting, then hands the whole group to one
+process_batch call so the model runs once per batch instead of once per
+request.
+"""
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+# Sentinel placed on the queue to stop the dispatcher thread
+_STOP = object()
+
+
+class MicroBatchScheduler:
+    """Group concurrent single-item requests into batched calls"""
+
+    def __init__(self, process_batch, max_batch_size=32, max_wait_ms=5, name="micro-batch"):
+        """
+        Args:
+            process_batch (callable): Takes a list of items and returns a
+                list of results in the same order
+            max_batch_size (int): Largest batch handed to process_batch
+            max_wait_ms (float): Longest time the first item of a batch
+                waits for others to join it
+            name (str): Name of the dispatcher thread
+        """
+        self.process_batch = process_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, max_wait_ms / 1000.0)
+        self.name = name
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+        self.batches = 0
+        self.items = 0
+
+    def submit(self, item):
+        """
+        Queue one item for the next batch
+
+        Returns:
+            Future: Resolves to the item's result, or to the exception
+            raised by process_batch for its batch
+        """
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError(f"{self.name} scheduler is closed")
+            if self._thread is None:
+                # Started lazily so importing the scheduler never spawns threads
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            self._queue.put((item, future))
+        return future
+
+    def close(self, wait=True):
+        """Stop accepting items; already queued items are still processed"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+            if thread is not None:
+                self._queue.put(_STOP)
+        if wait and thread is not None:
+            thread.join()
+
+    def stats(self):
+        """Return batching counters for monitoring"""
+        return {
+            'batches': self.batches,
+            'items': self.items,
+            'average_batch_size': round(self.items / self.batches, 2) if self.batches else 0.0,
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000.0,
+        }
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            entry = self._queue.get()
+            if entry is _STOP:
+                break
+            batch = [entry]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    # Drain whatever is already queued even once the deadline passed
+                    entry = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if entry is _STOP:
+                    stopping = True
+                    break
+                batch.append(entry)
+            self._dispatch(batch)
+
+    def _dispatch(self, batch):
+        batch = [(item, future) for item, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        self.batches += 1
+        self.items += len(batch)
+        try:
+            results = self.process_batch([item for item, _ in batch])
+            if len(results) != len(batch):
+                raise ValueError(f"process_batch returned {len(results)} results for {len(batch)} items")
+        except Exception as e:
+            logger.error(f"Error in {self.name} batch of {len(batch)} items: {e}")
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
@@ -0,0 +1,60 @@
+"""
+Database migration script to add the analysis_status column to FeedbackItem table
+"""
+import os
+import logging
+import sqlite3
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Database path
+db_path = os.path.join(os.getcwd(), 'feedback_system.db')
+
+def check_column_exists(cursor, table_name, column_name):
+    """Check if column exists in the table"""
+    cursor.execute(f"PRAGMA table_info({table_name})")
+    columns = cursor.fetchall()
+    return any(column[1] == column_name for column in columns)
+
+def migrate_analysis_status():
+    """Add analysis_status column to FeedbackItem table"""
+    conn = None
+    try:
+        logger.info(f"Connecting to database at {db_path}")
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+
+        if not check_column_exists(cursor, 'feedback_item', 'analysis_status'):
+            logger.info("Adding analysis_status column to FeedbackItem table")
+            cursor.execute("ALTER TABLE feedback_item ADD COLUMN analysis_status VARCHAR(20)")
+
+            # Items analyzed before this migration were analyzed inline
+            cursor.execute('''
+                UPDATE feedback_item SET analysis_status = 'done'
+                WHERE text_feedback IS NOT NULL AND text_feedback != ''
+            ''')
+            conn.commit()
+            logger.info("Migration completed successfully")
+        else:
+            logger.info("Column analysis_status already exists")
+
+        return True
+
+    except Exception as e:
+        logger.error(f"Migration failed: {e}")
+        if conn:
+            conn.rollback()
+        return False
+    finally:
+        if conn:
+            conn.close()
+
+if __name__ == "__main__":
+    logger.info("Starting migration for FeedbackItem table")
+    success = migrate_analysis_status()
+    if success:
+        logger.info("Migration completed successfully")
+    else:
+        logger.error("Migration failed")
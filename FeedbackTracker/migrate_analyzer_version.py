@@ -0,0 +1,60 @@
+"""
+Database migration script to add the indexed analyzer_version column to FeedbackItem table
+"""
+import os
+import logging
+import sqlite3
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Database path
+db_path = os.path.join(os.getcwd(), 'feedback_system.db')
+
+def check_column_exists(cursor, table_name, column_name):
+    """Check if column exists in the table"""
+    cursor.execute(f"PRAGMA table_info({table_name})")
+    columns = cursor.fetchall()
+    return any(column[1] == column_name for column in columns)
+
+def migrate_analyzer_version():
+    """Add analyzer_version column and its index to FeedbackItem table"""
+    conn = None
+    try:
+        logger.info(f"Connecting to database at {db_path}")
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+
+        if not check_column_exists(cursor, 'feedback_item', 'analyzer_version'):
+            # Existing rows keep NULL, which marks them stale for reanalyze_stale.py
+            logger.info("Adding analyzer_version column to FeedbackItem table")
+            cursor.execute("ALTER TABLE feedback_item ADD COLUMN analyzer_version VARCHAR(64)")
+        else:
+            # SQLite does not enforce VARCHAR lengths, so columns added as
+            # VARCHAR(20) by earlier runs already hold longer versions
+            logger.info("Column analyzer_version already exists")
+
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS ix_feedback_item_analyzer_version
+            ON feedback_item (analyzer_version)
+        ''')
+        conn.commit()
+        return True
+
+    except Exception as e:
+        logger.error(f"Migration failed: {e}")
+        if conn:
+            conn.rollback()
+        return False
+    finally:
+        if conn:
+            conn.close()
+
+if __name__ == "__main__":
+    logger.info("Starting migration for FeedbackItem table")
+    success = migrate_analyzer_version()
+    if success:
+        logger.info("Migration completed successfully")
+    else:
+        logger.error("Migration failed")
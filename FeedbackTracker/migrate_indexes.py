@@ -0,0 +1,64 @@
+"""
+Database migration script to add the indexes declared in models.py to an
+existing database
+
+New databases get these indexes from db.create_all(). Existing tables are
+left untouched by create_all(), so this script creates every declared index
+that is missing. It works on SQLite and PostgreSQL and is safe to re-run.
+
+Usage:
+    python migrate_indexes.py [--dry-run]
+"""
+import argparse
+import logging
+
+from sqlalchemy import inspect
+
+from app import app, db
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def missing_indexes():
+    """Return the model indexes whose table exists but the index does not"""
+    inspector = inspect(db.engine)
+    tables = set(inspector.get_table_names())
+    missing = []
+    for table in db.metadata.sorted_tables:
+        if table.name not in tables:
+            continue
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        missing.extend(index for index in sorted(table.indexes, key=lambda i: i.name)
+                       if index.name not in existing)
+    return missing
+
+
+def migrate_indexes(dry_run=False):
+    """Create the missing indexes, returning how many were (or would be) created"""
+    indexes = missing_indexes()
+    for index in indexes:
+        columns = ', '.join(column.name for column in index.columns)
+        logger.info(f"{'Would create' if dry_run else 'Creating'} index {index.name} on {index.table.name} ({columns})")
+        if not dry_run:
+            index.create(db.engine, checkfirst=True)
+    return len(indexes)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create indexes declared in models.py")
+    parser.add_argument('--dry-run', action='store_true', help="only list the missing indexes")
+    args = parser.parse_args()
+
+    with app.app_context():
+        logger.info(f"Checking indexes on {db.engine.url.render_as_string(hide_password=True)}")
+        count = migrate_indexes(dry_run=args.dry_run)
+        if count:
+            logger.info(f"{count} indexes {'missing' if args.dry_run else 'created'}")
+        else:
+            logger.info("All indexes already exist")
+        if count and not args.dry_run:
+            # Refresh planner statistics so the new indexes are used
+            with db.engine.begin() as conn:
+                conn.exec_driver_sql("ANALYZE")
@@ -0,0 +1,62 @@
+"""
+Database migration script to add the stored rating totals (rating_sum,
+rating_count, avg_rating) to FeedbackItem table
+
+Run check_rating_totals.py --fix afterwards to fill them for existing items.
+"""
+import os
+import logging
+import sqlite3
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Database path
+db_path = os.path.join(os.getcwd(), 'feedback_system.db')
+
+RATING_TOTAL_COLUMNS = [
+    ('rating_sum', 'INTEGER NOT NULL DEFAULT 0'),
+    ('rating_count', 'INTEGER NOT NULL DEFAULT 0'),
+    ('avg_rating', 'FLOAT'),
+]
+
+def check_column_exists(cursor, table_name, column_name):
+    """Check if column exists in the table"""
+    cursor.execute(f"PRAGMA table_info({table_name})")
+    columns = cursor.fetchall()
+    return any(column[1] == column_name for column in columns)
+
+def migrate_rating_totals():
+    """Add the rating total columns to FeedbackItem table"""
+    conn = None
+    try:
+        logger.info(f"Connecting to database at {db_path}")
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+
+        for column, column_type in RATING_TOTAL_COLUMNS:
+            if not check_column_exists(cursor, 'feedback_item', column):
+                logger.info(f"Adding {column} column to FeedbackItem table")
+                cursor.execute(f"ALTER TABLE feedback_item ADD COLUMN {column} {column_type}")
+            else:
+                logger.info(f"Column {column} already exists")
+        conn.commit()
+        return True
+
+    except Exception as e:
+        logger.error(f"Migration failed: {e}")
+        if conn:
+            conn.rollback()
+        return False
+    finally:
+        if conn:
+            conn.close()
+
+if __name__ == "__main__":
+    logger.info("Starting migration for FeedbackItem table")
+    success = migrate_rating_totals()
+    if success:
+        logger.info("Migration completed successfully; run check_rating_totals.py --fix to backfill")
+    else:
+        logger.error("Migration failed")
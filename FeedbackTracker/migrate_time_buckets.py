@@ -0,0 +1,107 @@
+"""
+Database migration script to add the indexed calendar bucket columns to the
+Feedback table and fill them for existing rows
+
+New rows get their buckets from the set_time_buckets event in models.py.
+Rows whose submission_day is still NULL are backfilled in chunks, so the
+script is safe to re-run. Rows without a submission_date keep NULL buckets
+rather than being filed under the day the migration runs, just as they
+already fall outside every date-range filter.
+"""
+import os
+import logging
+import sqlite3
+from datetime import datetime
+
+from time_buckets import buckets
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Database path
+db_path = os.path.join(os.getcwd(), 'feedback_system.db')
+
+BUCKET_COLUMNS = [
+    ('submission_day', 'DATE'),
+    ('submission_week', 'VARCHAR(7)'),
+    ('submission_month', 'VARCHAR(7)'),
+    ('submission_quarter', 'VARCHAR(7)'),
+    ('academic_term', 'VARCHAR(10)'),
+]
+
+CHUNK_SIZE = 1000
+
+def check_column_exists(cursor, table_name, column_name):
+    """Check if column exists in the table"""
+    cursor.execute(f"PRAGMA table_info({table_name})")
+    columns = cursor.fetchall()
+    return any(column[1] == column_name for column in columns)
+
+def migrate_time_buckets():
+    """Add the bucket columns and their indexes to Feedback, then backfill them"""
+    conn = None
+    try:
+        logger.info(f"Connecting to database at {db_path}")
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+
+        for column, column_type in BUCKET_COLUMNS:
+            if not check_column_exists(cursor, 'feedback', column):
+                logger.info(f"Adding {column} column to Feedback table")
+                cursor.execute(f"ALTER TABLE feedback ADD COLUMN {column} {column_type}")
+            else:
+                logger.info(f"Column {column} already exists")
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS ix_feedback_{column} ON feedback ({column})")
+        conn.commit()
+
+        # Backfill in id order; each chunk is committed on its own
+        filled = 0
+        last_id = 0
+        while True:
+            cursor.execute('''
+                SELECT id, submission_date FROM feedback
+                WHERE submission_day IS NULL AND submission_date IS NOT NULL AND id > ?
+                ORDER BY id LIMIT ?
+            ''', (last_id, CHUNK_SIZE))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+
+            updates = []
+            for feedback_id, submission_date in rows:
+                values = buckets(datetime.fromisoformat(submission_date))
+                values['submission_day'] = values['submission_day'].isoformat()
+                updates.append(tuple(values[column] for column, _ in BUCKET_COLUMNS) + (feedback_id,))
+
+            assignments = ', '.join(f"{column} = ?" for column, _ in BUCKET_COLUMNS)
+            cursor.executemany(f"UPDATE feedback SET {assignments} WHERE id = ?", updates)
+            conn.commit()
+
+            filled += len(rows)
+            last_id = rows[-1][0]
+            logger.info(f"Filled time buckets for {filled} feedback rows (up to #{last_id})")
+
+        cursor.execute("SELECT COUNT(*) FROM feedback WHERE submission_date IS NULL")
+        undated = cursor.fetchone()[0]
+        if undated:
+            logger.warning(f"Left time buckets NULL for {undated} feedback rows without a submission_date")
+
+        return True
+
+    except Exception as e:
+        logger.error(f"Migration failed: {e}")
+        if conn:
+            conn.rollback()
+        return False
+    finally:
+        if conn:
+            conn.close()
+
+if __name__ == "__main__":
+    logger.info("Starting migration for Feedback table")
+    success = migrate_time_buckets()
+    if success:
+        logger.info("Migration completed successfully")
+    else:
+        logger.error("Migration failed")
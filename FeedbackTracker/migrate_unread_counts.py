@@ -0,0 +1,61 @@
+"""
+Database migration script to add the unread_message_count column to User
+table and fill it from the unread DirectMessages
+"""
+import os
+import logging
+import sqlite3
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Database path
+db_path = os.path.join(os.getcwd(), 'feedback_system.db')
+
+def check_column_exists(cursor, table_name, column_name):
+    """Check if column exists in the table"""
+    cursor.execute(f"PRAGMA table_info({table_name})")
+    columns = cursor.fetchall()
+    return any(column[1] == column_name for column in columns)
+
+def migrate_unread_counts():
+    """Add and backfill the unread_message_count column of User table"""
+    conn = None
+    try:
+        logger.info(f"Connecting to database at {db_path}")
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+
+        if not check_column_exists(cursor, 'user', 'unread_message_count'):
+            logger.info("Adding unread_message_count column to User table")
+            cursor.execute("ALTER TABLE user ADD COLUMN unread_message_count INTEGER NOT NULL DEFAULT 0")
+        else:
+            logger.info("Column unread_message_count already exists")
+
+        cursor.execute("""
+            UPDATE user SET unread_message_count = (
+                SELECT count(*) FROM direct_message
+                WHERE direct_message.recipient_id = user.id AND direct_message.is_read = 0
+            )
+        """)
+        logger.info(f"Filled unread_message_count for {cursor.rowcount} users")
+        conn.commit()
+        return True
+
+    except Exception as e:
+        logger.error(f"Migration failed: {e}")
+        if conn:
+            conn.rollback()
+        return False
+    finally:
+        if conn:
+            conn.close()
+
+if __name__ == "__main__":
+    logger.info("Starting migration for User table")
+    success = migrate_unread_counts()
+    if success:
+        logger.info("Migration completed successfully")
+    else:
+        logger.error("Migration failed")
@@ -1,7 +1,10 @@
 from app import db
+from sqlalchemy import event
+from sqlalchemy.orm import joinedload, selectinload
 from flask_login import UserMixin
 from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
+from time_buckets import buckets
 
 # User roles constants
 ROLE_STUDENT = 'student'
@@ -18,9 +21,24 @@ STATUS_UPLOADED = 'uploaded'
 STATUS_REVIEWED = 'reviewed'
 STATUS_NOTED = 'noted'
 
+# Text analysis status constants for FeedbackItem
+ANALYSIS_PENDING = 'pending'
+ANALYSIS_PROCESSING = 'processing'  # Claimed by a background analysis worker
+ANALYSIS_DONE = 'done'
+ANALYSIS_FAILED = 'failed'
+
+# DailyRollup.question_id of rows that cover every question of an item
+ROLLUP_ALL_QUESTIONS = 0
+
 
 class User(UserMixin, db.Model):
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        # Department rosters and role lookups (students of a department, its CC)
+        db.Index('ix_user_department_role', 'department', 'role'),
+        # A department's students, newest first (manage_students pages)
+        db.Index('ix_user_department_role_joined', 'department', 'role', 'date_joined'),
+        {'extend_existing': True}
+    )
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(64), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
@@ -34,6 +52,9 @@ class User(UserMixin, db.Model):
     address = db.Column(db.String(200), nullable=True)
     department = db.Column(db.String(100), nullable=True)
 
+    # Unread DirectMessages received, maintained by unread_counters.py
+    unread_message_count = db.Column(db.Integer, nullable=False, default=0)
+
     # Relationship with Feedback
     submitted_feedback = db.relationship('Feedback', backref='student', lazy='dynamic',
                                          foreign_keys='Feedback.student_id')
@@ -112,16 +133,29 @@ class Question(db.Model):
 
 
 class Feedback(db.Model):
+    __table_args__ = (
+        # Date-window filters of every dashboard and report
+        db.Index('ix_feedback_submission_date', 'submission_date'),
+        # A student's own feedback, newest first
+        db.Index('ix_feedback_student_date', 'student_id', 'submission_date'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     submission_date = db.Column(db.DateTime, default=datetime.utcnow)
     is_anonymous = db.Column(db.Boolean, default=False)
 
-    # Relationship with FeedbackItem
-    items = db.relationship('FeedbackItem', backref='feedback', lazy='dynamic')
+    # Calendar buckets of submission_date, kept in step by set_time_buckets
+    submission_day = db.Column(db.Date, nullable=True, index=True)
+    submission_week = db.Column(db.String(7), nullable=True, index=True)  # ISO week, 'YYYY-WW'
+    submission_month = db.Column(db.String(7), nullable=True, index=True)  # 'YYYY-MM'
+    submission_quarter = db.Column(db.String(7), nullable=True, index=True)  # 'YYYY-Qn'
+    academic_term = db.Column(db.String(10), nullable=True, index=True)  # 'YYYY-YY/Tn'
+
+    # Relationship with FeedbackItem (a plain list, so list views can eager-load it)
+    items = db.relationship('FeedbackItem', backref='feedback', order_by='FeedbackItem.id')
 
     # Relationship with Response
-    responses = db.relationship('Response', backref='feedback', lazy='dynamic')
+    responses = db.relationship('Response', backref='feedback', order_by='Response.id')
 
     def __repr__(self):
         # Get student from relationship if not anonymous
@@ -135,19 +169,56 @@ class Feedback(db.Model):
                 return f'<Feedback #{self.id}>'
 
 
+@event.listens_for(Feedback, 'before_insert')
+@event.listens_for(Feedback, 'before_update')
+def set_time_buckets(mapper, connection, target):
+    """Fill the bucket columns from submission_date whenever a row is written"""
+    if target.submission_date is None:
+        target.submission_date = datetime.utcnow()
+    for column, value in buckets(target.submission_date).items():
+        setattr(target, column, value)
+
+
 class FeedbackItem(db.Model):
+    __table_args__ = (
+        # Joins from Feedback, with the sentiment label for per-label counts
+        db.Index('ix_feedback_item_feedback_label', 'feedback_id', 'sentiment_label'),
+        db.Index('ix_feedback_item_category_label', 'category_id', 'sentiment_label'),
+        db.Index('ix_feedback_item_analysis_status', 'analysis_status'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     feedback_id = db.Column(db.Integer, db.ForeignKey('feedback.id'), nullable=False)
     category_id = db.Column(db.Integer, db.ForeignKey('category.id'), nullable=False)
     text_feedback = db.Column(db.Text, nullable=True)
 
     # Relationship with Rating
-    ratings = db.relationship('Rating', backref='feedback_item', lazy='dynamic')
+    ratings = db.relationship('Rating', backref='feedback_item', order_by='Rating.id')
+
+    # Relationship with FeedbackAspect (normalized aspect_based_results)
+    aspects = db.relationship('FeedbackAspect', backref='feedback_item', lazy='dynamic')
+
+    # Relationship with FeedbackTheme (improvement-theme keyword counters)
+    themes = db.relationship('FeedbackTheme', backref='feedback_item', lazy='dynamic')
 
     # BERT analysis results
     sentiment_score = db.Column(db.Float, nullable=True)
     sentiment_label = db.Column(db.String(20), nullable=True)
     aspect_based_results = db.Column(db.Text, nullable=True)  # JSON string of aspect-based analysis
+    analysis_status = db.Column(db.String(20), nullable=True)  # None when there is no text to analyze
+    analyzer_version = db.Column(db.String(64), nullable=True, index=True)  # Analyzer that produced the text sentiment
+
+    # Totals of this item's ratings, stored at submission (see check_rating_totals.py)
+    rating_sum = db.Column(db.Integer, nullable=False, default=0)
+    rating_count = db.Column(db.Integer, nullable=False, default=0)
+    avg_rating = db.Column(db.Float, nullable=True)  # None when the item has no ratings
+
+    def is_analysis_pending(self):
+        return self.analysis_status in (ANALYSIS_PENDING, ANALYSIS_PROCESSING)
+
+    def set_rating_totals(self, rating_sum, rating_count):
+        self.rating_sum = rating_sum
+        self.rating_count = rating_count
+        self.avg_rating = rating_sum / rating_count if rating_count else None
 
     def __repr__(self):
         # Get category from relationship
@@ -159,6 +230,10 @@ class FeedbackItem(db.Model):
 
 
 class Rating(db.Model):
+    __table_args__ = (
+        # Covers rating averages per item and per question without table lookups
+        db.Index('ix_rating_item_question_value', 'feedback_item_id', 'question_id', 'rating_value'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     feedback_item_id = db.Column(db.Integer, db.ForeignKey('feedback_item.id'), nullable=False)
     question_id = db.Column(db.Integer, db.ForeignKey('question.id'), nullable=False)
@@ -168,7 +243,42 @@ class Rating(db.Model):
         return f'<Rating {self.rating_value} for Q{self.question_id}>'
 
 
+class FeedbackAspect(db.Model):
+    """One aspect mentioned in a FeedbackItem's text, mirroring aspect_based_results"""
+    __table_args__ = (
+        db.Index('ix_feedback_aspect_aspect_sentiment', 'aspect', 'sentiment'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    feedback_item_id = db.Column(db.Integer, db.ForeignKey('feedback_item.id'), nullable=False, index=True)
+    aspect = db.Column(db.String(50), nullable=False)
+    score = db.Column(db.Integer, nullable=False)
+    sentiment = db.Column(db.String(20), nullable=False)  # positive, negative or neutral
+    mention_count = db.Column(db.Integer, nullable=False, default=1)
+
+    def __repr__(self):
+        return f'<FeedbackAspect {self.aspect} ({self.sentiment}) for item #{self.feedback_item_id}>'
+
+
+class FeedbackTheme(db.Model):
+    """Occurrences of one improvement-theme keyword in a FeedbackItem's text"""
+    id = db.Column(db.Integer, primary_key=True)
+    feedback_item_id = db.Column(db.Integer, db.ForeignKey('feedback_item.id'), nullable=False, index=True)
+    keyword = db.Column(db.String(30), nullable=False)
+    hit_count = db.Column(db.Integer, nullable=False, default=1)
+
+    def __repr__(self):
+        return f'<FeedbackTheme {self.keyword} x{self.hit_count} for item #{self.feedback_item_id}>'
+
+
 class Response(db.Model):
+    __table_args__ = (
+        # Response history of one feedback, in order
+        db.Index('ix_response_feedback_date', 'feedback_id', 'response_date'),
+        # Pending work per staff member and pending counts per date window
+        db.Index('ix_response_staff_status', 'staff_id', 'status'),
+        db.Index('ix_response_status_date', 'status', 'response_date'),
+        db.Index('ix_response_forwarded_to', 'forwarded_to'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     feedback_id = db.Column(db.Integer, db.ForeignKey('feedback.id'), nullable=False)
     staff_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -189,6 +299,12 @@ class Response(db.Model):
 
 
 class DirectMessage(db.Model):
+    __table_args__ = (
+        # Unread counts and inbox/outbox listings, newest first
+        db.Index('ix_direct_message_recipient_read', 'recipient_id', 'is_read'),
+        db.Index('ix_direct_message_recipient_date', 'recipient_id', 'sent_date'),
+        db.Index('ix_direct_message_sender_date', 'sender_id', 'sent_date'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     sender_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     recipient_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -203,4 +319,98 @@ class DirectMessage(db.Model):
     parent_message = db.relationship('DirectMessage', remote_side=[id], backref='forwarded_messages', foreign_keys=[parent_message_id])
 
     def __repr__(self):
-        return f'<DirectMessage #{self.id} from {self.sender.username} to {self.recipient.username}>'
\ No newline at end of file
+        return f'<DirectMessage #{self.id} from {self.sender.username} to {self.recipient.username}>'
+
+
+class DailyRollup(db.Model):
+    """
+    Pre-aggregated ratings and sentiment per day, department, category,
+    question and sentiment label, maintained by rollups.py
+
+    Rows with question_id ROLLUP_ALL_QUESTIONS describe whole FeedbackItems
+    (item_count plus the totals of all their ratings); other rows hold the
+    ratings of a single question. Missing departments and labels are stored
+    as empty strings so they can be part of the unique key.
+    """
+    __table_args__ = (
+        db.UniqueConstraint('day', 'department', 'category_id', 'question_id', 'sentiment_label',
+                            name='uq_daily_rollup_key'),
+        db.Index('ix_daily_rollup_department_day', 'department', 'day'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    department = db.Column(db.String(100), nullable=False, default='')
+    category_id = db.Column(db.Integer, db.ForeignKey('category.id'), nullable=False)
+    question_id = db.Column(db.Integer, nullable=False, default=0)  # ROLLUP_ALL_QUESTIONS for item rows
+    sentiment_label = db.Column(db.String(20), nullable=False, default='')
+    rating_sum = db.Column(db.Integer, nullable=False, default=0)
+    rating_count = db.Column(db.Integer, nullable=False, default=0)
+    item_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<DailyRollup {self.day} {self.department or "-"} c{self.category_id} q{self.question_id} {self.sentiment_label or "-"}>'
+
+
+class AnalysisResult(db.Model):
+    """Durable cache of text analysis results, shared by all workers"""
+    __table_args__ = (
+        db.UniqueConstraint('text_hash', 'analyzer_version', name='uq_analysis_result_text_version'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    text_hash = db.Column(db.String(64), nullable=False)  # sha256 of the normalized text
+    analyzer_version = db.Column(db.String(64), nullable=False)
+    sentiment_score = db.Column(db.Float, nullable=False)
+    sentiment_label = db.Column(db.String(20), nullable=False)
+    aspects_json = db.Column(db.Text, nullable=False)  # JSON string of aspect-based analysis
+    created_date = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<AnalysisResult {self.text_hash[:12]} v{self.analyzer_version}>'
+
+
+class CatalogVersion(db.Model):
+    """
+    Single-row counter of catalog changes (categories, questions, courses),
+    bumped by catalog.invalidate() so every worker can tell that its cached
+    copy is stale
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<CatalogVersion {self.version}>'
+
+
+# Eager-loading profiles for the list and detail pages. Each one loads every
+# relationship the page's template touches up front, so rendering a page
+# costs a fixed number of queries however many rows it shows.
+
+def feedback_list_options():
+    """Feedback rows with their student, items (and categories) and responses"""
+    return (joinedload(Feedback.student),
+            selectinload(Feedback.items).joinedload(FeedbackItem.category),
+            selectinload(Feedback.responses))
+
+
+def feedback_detail_options():
+    """feedback_list_options() plus every item's ratings and their questions"""
+    return (joinedload(Feedback.student),
+            selectinload(Feedback.items).joinedload(FeedbackItem.category),
+            selectinload(Feedback.items).selectinload(FeedbackItem.ratings).joinedload(Rating.question),
+            selectinload(Feedback.responses))
+
+
+def feedback_item_options():
+    """FeedbackItems with their category and their ratings' questions"""
+    return (joinedload(FeedbackItem.category),
+            selectinload(FeedbackItem.ratings).joinedload(Rating.question))
+
+
+def response_options():
+    """Responses with the staff member who wrote them and the forward target"""
+    return (joinedload(Response.staff), joinedload(Response.forwarded_user))
+
+
+def message_options():
+    """DirectMessages with their sender and recipient"""
+    return (joinedload(DirectMessage.sender), joinedload(DirectMessage.recipient))
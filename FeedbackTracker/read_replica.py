@@ -0,0 +1,53 @@
+"""
+Route the queries of heavy read-only views to an analytics database
+
+When ANALYTICS_DATABASE_URL is set it becomes the "analytics" bind: a
+PostgreSQL streaming replica in production, or a read-only snapshot of the
+SQLite file locally. Inside analytics_reads() (or a view decorated with
+@uses_analytics_db) every query of db.session goes to that bind, so the
+primary only serves submissions, responses and messages. Without the bind
+everything stays on the primary.
+
+Reads may lag the primary by the replication delay. Writes are never
+routed: flushes always use the primary, and code inside the block must not
+issue UPDATE/INSERT statements of its own.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from flask_sqlalchemy.session import Session
+
+ANALYTICS_BIND = 'analytics'
+
+_analytics_reads = ContextVar('analytics_reads', default=False)
+
+
+class RoutingSession(Session):
+    """db.session class that sends reads to the analytics bind inside analytics_reads()"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and _analytics_reads.get() and not self._flushing:
+            engine = self._db.engines.get(ANALYTICS_BIND)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@contextmanager
+def analytics_reads():
+    """Run the block's db.session queries on the analytics bind, if configured"""
+    token = _analytics_reads.set(True)
+    try:
+        yield
+    finally:
+        _analytics_reads.reset(token)
+
+
+def uses_analytics_db(view):
+    """Decorator running a read-only view inside analytics_reads()"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        with analytics_reads():
+            return view(*args, **kwargs)
+    return wrapper
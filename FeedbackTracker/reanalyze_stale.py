@@ -0,0 +1,40 @@
+"""
+Re-analyze only the FeedbackItem rows produced by an older analyzer version
+
+Rows whose analyzer_version already matches the current analyzer are left
+untouched, so a small lexicon fix plus a version bump only re-scores the
+rows that need it. Work is done in bounded, individually committed batches.
+
+Usage:
+    python reanalyze_stale.py [--batch-size N] [--max-rows N] [--purge-results]
+"""
+import argparse
+import logging
+
+from app import app, db
+from bert_analysis import analyzer_version
+from analysis_service import stale_items_query, reanalyze_stale, purge_stale_results
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-analyze feedback scored by an older analyzer version")
+    parser.add_argument('--batch-size', type=int, default=500, help="rows re-analyzed per commit")
+    parser.add_argument('--max-rows', type=int, default=None, help="stop after this many rows")
+    parser.add_argument('--purge-results', action='store_true',
+                        help="also delete stored analysis results of older analyzer versions")
+    args = parser.parse_args()
+
+    with app.app_context():
+        stale = stale_items_query().count()
+        logger.info(f"{stale} feedback items are stale for analyzer version {analyzer_version()}")
+
+        processed = reanalyze_stale(batch_size=args.batch_size, max_rows=args.max_rows)
+        logger.info(f"Re-analyzed {processed} feedback items")
+
+        if args.purge_results:
+            purge_stale_results()
+            db.session.commit()
@@ -0,0 +1,39 @@
+"""
+Rebuild the daily_rollup table from the raw feedback tables
+
+Use it once to backfill after deploying the rollups, and whenever the
+rollups are suspected to be out of step (e.g. after editing feedback rows
+by hand). Importing the app creates the table if it is missing. The rebuild
+runs in a single transaction, so readers see either the old or the new
+rollups.
+
+Usage:
+    python rebuild_rollups.py [--from-day YYYY-MM-DD] [--chunk-size N]
+"""
+import argparse
+import logging
+from datetime import datetime
+
+from app import app, db
+from rollups import rebuild_rollups
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the daily ratings and sentiment rollups")
+    parser.add_argument('--from-day', type=lambda value: datetime.strptime(value, '%Y-%m-%d').date(),
+                        default=None, help="only rebuild days from this one on (default: all)")
+    parser.add_argument('--chunk-size', type=int, default=2000, help="feedback items aggregated per step")
+    args = parser.parse_args()
+
+    with app.app_context():
+        try:
+            processed = rebuild_rollups(from_day=args.from_day, chunk_size=args.chunk_size)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        logger.info(f"Rebuilt daily rollups from {processed} feedback items")
@@ -0,0 +1,47 @@
+"""
+Correct drift between the stored unread-message counters on User and the
+unread DirectMessages
+
+The counters are adjusted as messages are sent and read; this job catches
+anything that bypassed those paths (rows edited by hand, messages deleted,
+failed requests). Run it periodically, e.g. from cron. Exits non-zero in
+--dry-run mode if any counter is off.
+
+Usage:
+    python reconcile_unread_counts.py [--dry-run]
+"""
+import argparse
+import logging
+import sys
+
+from app import app, db
+from unread_counters import reconcile_unread_counts
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconcile the stored unread-message counters")
+    parser.add_argument('--dry-run', action='store_true', help="only report differing counters")
+    args = parser.parse_args()
+
+    with app.app_context():
+        try:
+            drifted = reconcile_unread_counts(fix=not args.dry_run)
+            if args.dry_run:
+                db.session.rollback()
+            else:
+                db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        if not drifted:
+            logger.info("All unread-message counters are consistent")
+        elif args.dry_run:
+            logger.error(f"{drifted} users have inconsistent unread-message counters")
+            sys.exit(1)
+        else:
+            logger.info(f"Corrected the unread-message counters of {drifted} users")
@@ -0,0 +1,140 @@
+"""
+Re-score the text analysis of existing FeedbackItem rows
+
+Run this after changing lexicons or analyzer logic. Rows are streamed in
+id order, one chunk at a time, and the analysis of each chunk is fanned out
+over a process pool. The results are written back with bulk UPDATEs, and a
+checkpoint is saved after every committed chunk, so an interrupted run
+resumes where it stopped. Items whose analysis fails are left unchanged and
+hold the checkpoint just before the first of them, so the next run retries
+them.
+
+Usage:
+    python rescore_feedback.py [--chunk-size N] [--workers N] [--restart]
+"""
+import argparse
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from app import app, db
+from models import FeedbackItem
+from bert_analysis import analyzer_version, compute_analysis_batch, warmup
+from analysis_service import bulk_apply_analysis
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Default checkpoint location, next to the database in the instance folder
+DEFAULT_CHECKPOINT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'rescore_checkpoint.json')
+
+
+def load_checkpoint(path):
+    """Return the last committed FeedbackItem id and processed count, or (0, 0)"""
+    if not os.path.exists(path):
+        return 0, 0
+    with open(path) as f:
+        checkpoint = json.load(f)
+    if checkpoint.get('analyzer_version') != analyzer_version():
+        # Rows before the checkpoint were scored by another analyzer version
+        logger.info("Checkpoint belongs to another analyzer version, starting over")
+        return 0, 0
+    return checkpoint['last_id'], checkpoint['processed']
+
+
+def save_checkpoint(path, last_id, processed):
+    """Atomically record progress after a committed chunk"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({
+            'last_id': last_id,
+            'processed': processed,
+            'analyzer_version': analyzer_version(),
+            'updated': time.strftime('%Y-%m-%dT%H:%M:%S')
+        }, f)
+    os.replace(tmp_path, path)
+
+
+def fan_out(pool, workers):
+    """Return a compute_batch callable that splits texts across the pool"""
+    def compute_batch(texts, lexicon=None):
+        if not texts:
+            return []
+        size = -(-len(texts) // workers)
+        parts = [texts[start:start + size] for start in range(0, len(texts), size)]
+        results = []
+        # Workers analyze with the parent's lexicon, the version results are stored under
+        for part_results in pool.map(partial(compute_analysis_batch, lexicon=lexicon), parts):
+            results.extend(part_results)
+        return results
+    return compute_batch
+
+
+def rescore(chunk_size, workers, checkpoint_path, restart=False):
+    """Re-score every FeedbackItem with text, resuming from the checkpoint"""
+    if restart and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    last_id, processed = load_checkpoint(checkpoint_path)
+    if last_id:
+        logger.info(f"Resuming after FeedbackItem #{last_id} ({processed} rows already re-scored)")
+
+    failed = 0
+    resume_point = None  # checkpoint frozen just before the first failed item
+    started = time.time()
+    # Pool processes only run the pure analyzer and never touch the database
+    with ProcessPoolExecutor(max_workers=workers, initializer=warmup) as pool:
+        compute_batch = fan_out(pool, workers)
+        with app.app_context():
+            while True:
+                rows = (db.session.query(FeedbackItem.id, FeedbackItem.text_feedback)
+                        .filter(FeedbackItem.id > last_id)
+                        .filter(FeedbackItem.text_feedback.isnot(None))
+                        .filter(FeedbackItem.text_feedback != '')
+                        .order_by(FeedbackItem.id)
+                        .limit(chunk_size)
+                        .all())
+                if not rows:
+                    break
+
+                try:
+                    updated, failed_ids = bulk_apply_analysis([tuple(row) for row in rows],
+                                                              compute_batch=compute_batch)
+                    db.session.commit()
+                except Exception:
+                    db.session.rollback()
+                    raise
+
+                if failed_ids and resume_point is None:
+                    first_failed = min(failed_ids)
+                    done_before = sum(1 for row in rows if row[0] < first_failed)
+                    resume_point = (first_failed - 1, processed + done_before)
+                processed += updated
+                failed += len(failed_ids)
+                last_id = rows[-1][0]
+                save_checkpoint(checkpoint_path, *(resume_point or (last_id, processed)))
+                rate = processed / max(time.time() - started, 1e-6)
+                logger.info(f"Re-scored up to FeedbackItem #{last_id} ({processed} rows, {rate:.0f} rows/s)")
+
+    if failed:
+        logger.warning(f"{failed} rows failed analysis and were left unchanged; "
+                       f"the next run resumes after FeedbackItem #{resume_point[0]}")
+    elif os.path.exists(checkpoint_path):
+        # A finished run leaves nothing to resume
+        os.remove(checkpoint_path)
+    logger.info(f"Re-scoring complete: {processed} rows with analyzer version {analyzer_version()}")
+    return processed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-score text analysis of existing feedback")
+    parser.add_argument('--chunk-size', type=int, default=2000, help="rows fetched and updated per chunk")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="analysis processes")
+    parser.add_argument('--checkpoint', default=DEFAULT_CHECKPOINT, help="checkpoint file path")
+    parser.add_argument('--restart', action='store_true', help="ignore any saved checkpoint")
+    args = parser.parse_args()
+
+    rescore(args.chunk_size, args.workers, args.checkpoint, restart=args.restart)
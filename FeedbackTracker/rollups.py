@@ -0,0 +1,215 @@
+"""
+Daily rollups of ratings and sentiment for the dashboards and reports
+
+Every FeedbackItem contributes to the DailyRollup row of its (day,
+department, category, sentiment label) with item_count 1 and the totals of
+its ratings, and to one row per rated question with that question's rating.
+Contributions are added in the transaction that creates the item and are
+moved between labels whenever re-analysis changes an item's sentiment
+label, so reports sum a few rows per day instead of joining raw ratings.
+"""
+import logging
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import Float, cast, delete, func
+
+from app import db
+from models import DailyRollup, Feedback, FeedbackItem, Rating, User, ROLLUP_ALL_QUESTIONS
+from db_utils import upsert_adding
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of item ids per IN (...) lookup
+ITEM_CHUNK_SIZE = 500
+
+ROLLUP_KEY = ['day', 'department', 'category_id', 'question_id', 'sentiment_label']
+ROLLUP_COUNTERS = ['rating_sum', 'rating_count', 'item_count']
+
+
+def item_contributions(item_ids):
+    """
+    Return what the given FeedbackItems currently contribute to the rollups
+
+    Args:
+        item_ids (list): FeedbackItem ids
+
+    Returns:
+        dict: rollup key tuple (see ROLLUP_KEY) -> [rating_sum, rating_count, item_count]
+    """
+    contributions = {}
+
+    def add(key, rating_sum, rating_count, item_count):
+        totals = contributions.setdefault(key, [0, 0, 0])
+        totals[0] += rating_sum
+        totals[1] += rating_count
+        totals[2] += item_count
+
+    for start in range(0, len(item_ids), ITEM_CHUNK_SIZE):
+        chunk = item_ids[start:start + ITEM_CHUNK_SIZE]
+        items = (db.session.query(FeedbackItem.id, Feedback.submission_date, User.department,
+                                  FeedbackItem.category_id, FeedbackItem.sentiment_label)
+                 .join(Feedback, FeedbackItem.feedback_id == Feedback.id)
+                 .join(User, Feedback.student_id == User.id)
+                 .filter(FeedbackItem.id.in_(chunk))
+                 .all())
+        ratings = (db.session.query(Rating.feedback_item_id, Rating.question_id,
+                                    func.sum(Rating.rating_value), func.count(Rating.id))
+                   .filter(Rating.feedback_item_id.in_(chunk))
+                   .group_by(Rating.feedback_item_id, Rating.question_id)
+                   .all())
+
+        item_ratings = {}
+        for item_id, question_id, rating_sum, rating_count in ratings:
+            item_ratings.setdefault(item_id, []).append((question_id, int(rating_sum), rating_count))
+
+        for item_id, submission_date, department, category_id, label in items:
+            day = (submission_date or datetime.utcnow()).date()
+            base = (day, department or '', category_id)
+            label = label or ''
+            question_totals = item_ratings.get(item_id, [])
+            add(base + (ROLLUP_ALL_QUESTIONS, label),
+                sum(total for _, total, _ in question_totals),
+                sum(count for _, _, count in question_totals),
+                1)
+            for question_id, rating_sum, rating_count in question_totals:
+                add(base + (question_id, label), rating_sum, rating_count, 0)
+
+    return contributions
+
+
+def apply_contributions(contributions, sign=1):
+    """Add (sign=1) or subtract (sign=-1) contributions to the rollup table"""
+    rows = []
+    for key, counters in contributions.items():
+        if not any(counters):
+            continue
+        row = dict(zip(ROLLUP_KEY, key))
+        row.update(zip(ROLLUP_COUNTERS, (sign * value for value in counters)))
+        rows.append(row)
+    upsert_adding(DailyRollup, rows, ROLLUP_KEY, ROLLUP_COUNTERS)
+
+
+def add_items(item_ids):
+    """Add new FeedbackItems (and their flushed ratings) to the rollups"""
+    apply_contributions(item_contributions(item_ids))
+
+
+def remove_items(item_ids):
+    """Subtract FeedbackItems from the rollups, e.g. before deleting them"""
+    apply_contributions(item_contributions(item_ids), sign=-1)
+
+
+@contextmanager
+def relabeling(item_ids):
+    """
+    Keep the rollups in step while the block changes the sentiment labels of
+    the given items
+
+    The items' contributions are read before and after the block, and the
+    difference is written in the caller's transaction, moving item counts
+    and rating totals from the old label's rows to the new label's rows.
+    """
+    before = item_contributions(item_ids)
+    yield
+    db.session.flush()
+    after = item_contributions(item_ids)
+
+    # Only the difference is written, which is nothing for unchanged labels
+    delta = {}
+    for key in before.keys() | after.keys():
+        old = before.get(key, [0, 0, 0])
+        new = after.get(key, [0, 0, 0])
+        delta[key] = [n - o for n, o in zip(new, old)]
+    apply_contributions(delta)
+
+
+def rebuild_rollups(from_day=None, chunk_size=2000):
+    """
+    Recompute the rollups from the raw feedback tables
+
+    Args:
+        from_day (date): Only rebuild days from this one on (None for all)
+        chunk_size (int): FeedbackItems aggregated per step
+
+    Returns:
+        int: Number of FeedbackItems aggregated
+    """
+    query = delete(DailyRollup)
+    if from_day is not None:
+        query = query.where(DailyRollup.day >= from_day)
+    db.session.execute(query)
+
+    items = (db.session.query(FeedbackItem.id)
+             .join(Feedback, FeedbackItem.feedback_id == Feedback.id)
+             .order_by(FeedbackItem.id))
+    if from_day is not None:
+        items = items.filter(Feedback.submission_date >= datetime.combine(from_day, datetime.min.time()))
+
+    processed = 0
+    last_id = 0
+    while True:
+        chunk = [item_id for item_id, in items.filter(FeedbackItem.id > last_id).limit(chunk_size)]
+        if not chunk:
+            break
+        add_items(chunk)
+        processed += len(chunk)
+        last_id = chunk[-1]
+        logger.info(f"Aggregated {processed} feedback items into daily rollups (up to #{last_id})")
+    return processed
+
+
+def rollup_query(*columns, from_day=None, to_day=None, department=None, questions=False):
+    """
+    Start a query over DailyRollup restricted to a day range and department
+
+    Args:
+        columns: Columns / aggregates to select
+        from_day (date): First day included
+        to_day (date): Last day included
+        department (str): Only this department (None for all)
+        questions (bool): Select the per-question rows instead of the
+            per-item rows
+
+    Returns:
+        Query: The filtered query
+    """
+    query = db.session.query(*columns).select_from(DailyRollup)
+    if questions:
+        query = query.filter(DailyRollup.question_id != ROLLUP_ALL_QUESTIONS)
+    else:
+        query = query.filter(DailyRollup.question_id == ROLLUP_ALL_QUESTIONS)
+    if from_day is not None:
+        query = query.filter(DailyRollup.day >= from_day)
+    if to_day is not None:
+        query = query.filter(DailyRollup.day <= to_day)
+    if department is not None:
+        query = query.filter(DailyRollup.department == department)
+    return query
+
+
+
+def rollup_average():
+    """Average rating expression over the selected rollup rows"""
+    return (cast(func.sum(DailyRollup.rating_sum), Float) /
+            func.nullif(func.sum(DailyRollup.rating_count), 0)).label('avg_rating')
+
+
+def period_start(day, period):
+    """
+    Return the first day of the period containing day
+
+    Args:
+        day (date): Any day
+        period (str): 'week', 'month', 'quarter' or 'year' (anything else
+            keeps the day itself), as in date_trunc
+    """
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    if period == 'month':
+        return day.replace(day=1)
+    if period == 'quarter':
+        return day.replace(month=(day.month - 1) // 3 * 3 + 1, day=1)
+    if period == 'year':
+        return day.replace(month=1, day=1)
+    return day
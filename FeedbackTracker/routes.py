@@ -1,19 +1,30 @@
 import logging
 import json
+import os
 from datetime import datetime, timedelta
-from flask import render_template, redirect, url_for, flash, request, jsonify
+from flask import render_template, redirect, url_for, flash, request, jsonify, abort
 from flask_login import login_user, logout_user, login_required, current_user
 from werkzeug.security import generate_password_hash
-from sqlalchemy import func, desc, and_, or_, distinct
+from sqlalchemy import Float, cast, func, desc, and_, or_, insert
 
 from app import app, db
 from models import (
-    User, Category, Question, Feedback, FeedbackItem, Rating, Response, DirectMessage,
+    User, Category, Question, Course, Staff, Feedback, FeedbackItem, FeedbackAspect, FeedbackTheme, Rating, DailyRollup, Response, DirectMessage,
     ROLE_STUDENT, ROLE_CC, ROLE_HOD, ROLE_PRINCIPAL,
     STATUS_PENDING, STATUS_ACCEPTED, STATUS_FORWARDED, STATUS_RESOLVED, STATUS_UPLOADED,
-    STATUS_REVIEWED, STATUS_NOTED
+    STATUS_REVIEWED, STATUS_NOTED, ANALYSIS_PENDING, ANALYSIS_FAILED,
+    feedback_list_options, feedback_detail_options, feedback_item_options, response_options, message_options
 )
-from bert_analysis import analyze_text, aspect_based_analysis
+from bert_analysis import cache_stats, scheduler_stats, pinned_lexicon
+from analysis_service import get_analysis, rating_sentiment, analysis_values, aspect_rows
+import analysis_queue
+from feedback_themes import theme_rows, theme_suggestions
+from rollups import add_items, rollup_query, rollup_average, period_start
+from dashboard_summary import staff_dashboard_summary
+from db_utils import keyset_page
+from read_replica import uses_analytics_db
+from catalog import get_catalog, invalidate as invalidate_catalog
+import unread_counters
 
 logger = logging.getLogger(__name__)
 
@@ -189,6 +200,7 @@ def initialize_database():
                         db.session.add(question)
 
             db.session.commit()
+            invalidate_catalog()
             logger.info("Database initialized with default categories and questions")
     except Exception as e:
         logger.error(f"Error initializing database: {e}")
@@ -289,10 +301,16 @@ def dashboard_student():
         return redirect(url_for('index'))
 
     # Get recent feedback submissions
-    recent_feedback = Feedback.query.filter_by(student_id=current_user.id).order_by(Feedback.submission_date.desc()).limit(5).all()
+    recent_feedback = (Feedback.query
+                      .options(*feedback_list_options())
+                      .filter_by(student_id=current_user.id)
+                      .order_by(Feedback.submission_date.desc())
+                      .limit(5)
+                      .all())
 
     # Get feedback with pending responses
     pending_feedback = (Feedback.query
+                       .options(*feedback_list_options())
                        .join(Response, Feedback.id == Response.feedback_id)
                        .filter(Feedback.student_id == current_user.id)
                        .filter(Response.status == STATUS_PENDING)
@@ -300,6 +318,7 @@ def dashboard_student():
 
     # Get recent responses to feedback
     recent_responses = (Response.query
+                       .options(*response_options())
                        .join(Feedback, Feedback.id == Response.feedback_id)
                        .filter(Feedback.student_id == current_user.id)
                        .order_by(Response.response_date.desc())
@@ -324,76 +343,46 @@ def dashboard_staff():
     days = request.args.get('days', 30, type=int)
     from_date = datetime.utcnow() - timedelta(days=days)
 
-    # Get total feedback count
-    total_feedback = Feedback.query.filter(Feedback.submission_date >= from_date).count()
-
-    # Get pending feedback count
-    pending_count = (Response.query
-                    .filter(Response.status == STATUS_PENDING)
-                    .filter(Response.response_date >= from_date)
-                    .count())
-
-    # Get category-wise feedback counts
-    category_counts = (db.session.query(
-                        Category.name, 
-                        func.count(FeedbackItem.id))
-                      .join(FeedbackItem, Category.id == FeedbackItem.category_id)
-                      .join(Feedback, FeedbackItem.feedback_id == Feedback.id)
-                      .filter(Feedback.submission_date >= from_date)
-                      .group_by(Category.name)
-                      .all())
+    # Counts and grouped aggregates in one round trip (ratings and
+    # sentiment come from the daily rollups, whole days)
+    summary = staff_dashboard_summary(current_user.id, from_date)
 
     # Get today's feedback
     today = datetime.utcnow().date()
     today_feedback = (Feedback.query
-                     .filter(func.date(Feedback.submission_date) == today)
+                     .options(*feedback_list_options())
+                     .filter(Feedback.submission_day == today)
                      .order_by(Feedback.submission_date.desc())
                      .all())
 
     # Get recent feedback with low ratings (average rating <= 2)
-    low_ratings = (db.session.query(Feedback)
-                  .join(FeedbackItem, Feedback.id == FeedbackItem.feedback_id)
-                  .join(Rating, FeedbackItem.id == Rating.feedback_item_id)
-                  .group_by(Feedback.id)
-                  .having(func.avg(Rating.rating_value) <= 2)
-                  .filter(Feedback.submission_date >= from_date)
+    # (averaged over all of the feedback's ratings via the stored item totals;
+    # recent feedback is found through the date index before any grouping)
+    recent_ids = (db.session.query(Feedback.id)
+                  .filter(Feedback.submission_date >= from_date))
+    low_rated_ids = (db.session.query(FeedbackItem.feedback_id)
+                     .filter(FeedbackItem.feedback_id.in_(recent_ids))
+                     .group_by(FeedbackItem.feedback_id)
+                     .having(func.sum(FeedbackItem.rating_count) > 0)
+                     .having(func.sum(FeedbackItem.rating_sum) <= 2 * func.sum(FeedbackItem.rating_count)))
+    low_ratings = (Feedback.query
+                  .filter(Feedback.id.in_(low_rated_ids))
                   .order_by(Feedback.submission_date.desc())
                   .limit(5)
                   .all())
 
     # Get feedback requiring attention (pending responses)
     attention_needed = (Feedback.query
+                       .options(*feedback_detail_options())
                        .join(Response, Feedback.id == Response.feedback_id)
                        .filter(Response.status == STATUS_PENDING)
                        .filter(Response.staff_id == current_user.id)
                        .order_by(Feedback.submission_date.desc())
                        .all())
 
-    # For visualization: Average ratings by category
-    avg_ratings = (db.session.query(
-                   Category.name, 
-                   func.avg(Rating.rating_value).label('avg_rating'))
-                  .join(FeedbackItem, Category.id == FeedbackItem.category_id)
-                  .join(Rating, FeedbackItem.id == Rating.feedback_item_id)
-                  .join(Feedback, FeedbackItem.feedback_id == Feedback.id)
-                  .filter(Feedback.submission_date >= from_date)
-                  .group_by(Category.name)
-                  .all())
-
-    # Sentiment analysis summary
-    sentiment_summary = (db.session.query(
-                        FeedbackItem.sentiment_label,
-                        func.count(FeedbackItem.id))
-                       .filter(FeedbackItem.sentiment_label.isnot(None))
-                       .join(Feedback, FeedbackItem.feedback_id == Feedback.id)
-                       .filter(Feedback.submission_date >= from_date)
-                       .group_by(FeedbackItem.sentiment_label)
-                       .all())
-
     # Get direct messages for the message center
-    received_messages = DirectMessage.query.filter_by(recipient_id=current_user.id).order_by(DirectMessage.sent_date.desc()).limit(10).all()
-    sent_messages = DirectMessage.query.filter_by(sender_id=current_user.id).order_by(DirectMessage.sent_date.desc()).limit(10).all()
-    unread_messages = DirectMessage.query.filter_by(recipient_id=current_user.id, is_read=False).count()
+    received_messages = DirectMessage.query.options(*message_options()).filter_by(recipient_id=current_user.id).order_by(DirectMessage.sent_date.desc()).limit(10).all()
+    sent_messages = DirectMessage.query.options(*message_options()).filter_by(sender_id=current_user.id).order_by(DirectMessage.sent_date.desc()).limit(10).all()
 
     # Get potential recipients for messaging (initialize with empty list as default)
     recipients = []
@@ -426,17 +415,18 @@ def dashboard_staff():
     ).all()
 
     return render_template('dashboard_staff.html',
-                          total_feedback=total_feedback,
-                          pending_count=pending_count,
-                          category_counts=category_counts,
+                          total_feedback=summary.total_feedback,
+                          pending_count=summary.pending_count,
+                          category_counts=summary.category_counts,
                           today_feedback=today_feedback,
                           low_ratings=low_ratings,
                           attention_needed=attention_needed,
-                          avg_ratings=avg_ratings,
-                          sentiment_summary=sentiment_summary,
+                          avg_ratings=summary.avg_ratings,
+                          sentiment_summary=summary.sentiment_summary,
+                          pending_analysis=summary.pending_analysis,
                           days=days,
                           received_messages=received_messages,
-                          unread_messages=unread_messages,
+                          unread_messages=summary.unread_messages,
                           recipients=recipients,
                           staff_members=staff_members,
                           Response=Response)
@@ -459,21 +449,29 @@ def submit_feedback():
             db.session.add(feedback)
             db.session.flush()  # Get feedback ID without committing
 
+            # Whether text analysis is deferred to the background queue
+            background_analysis = analysis_queue.is_background_mode()
+
+            # Categories and questions come from the cached catalog
+            catalog = get_catalog()
+
             # Check if submitting specific category
             submit_category = request.form.get('submit_category')
 
             if submit_category:
                 # Handle single category submission
-                selected_categories = [Category.query.get_or_404(submit_category)]
+                category = catalog.get(submit_category)
+                if category is None:
+                    abort(404)
+                selected_categories = [category]
             else:
                 # Handle multiple categories
-                selected_category_ids = request.form.getlist('selected_categories')
-                selected_categories = []
-                if selected_category_ids:
-                    selected_categories = Category.query.filter(Category.id.in_(selected_category_ids)).all()
+                selected_category_ids = set(request.form.getlist('selected_categories'))
+                selected_categories = [category for category in catalog.categories
+                                       if str(category.id) in selected_category_ids]
 
             # Always include "Other" category if it has text
-            other_category = Category.query.filter_by(name="Other").first()
+            other_category = catalog.named("Other")
             if other_category and other_category not in selected_categories:
                 other_text = request.form.get(f'text_{other_category.id}', '').strip()
                 if other_text:
@@ -483,7 +481,11 @@ def submit_feedback():
             if not selected_categories:
                 raise ValueError("No categories selected and no feedback provided")
 
-            # Process each selected category's feedback
+            # Column values of every item, plus its ratings, theme counters and
+            # aspects, built in memory so the whole submission is written in batches
+            item_rows = []
+            item_children = {}  # category id -> (rating values by question id, text, aspect rows)
+            pending_categories = []  # items whose text analysis is deferred to the background queue
             for category in selected_categories:
                 text_feedback = request.form.get(f'text_{category.id}', '').strip()
 
@@ -491,95 +493,82 @@ def submit_feedback():
                 if category.name == "Other" and not text_feedback:
                     continue
 
-                # Create feedback item for this category
-                feedback_item = FeedbackItem()
-                feedback_item.feedback_id = feedback.id
-                feedback_item.category_id = category.id
-                feedback_item.text_feedback = text_feedback
-                db.session.add(feedback_item)
-                db.session.flush()  # Get feedback item ID
-
                 # Skip ratings for "Other" category as it only has text
+                ratings = {}
                 if category.name != "Other":
                     # Process ratings for this category
-                    total_rating = 0
-                    rating_count = 0
-
                     for question in category.questions:
                         rating_value = int(request.form.get(f'rating_{question.id}', 0))
                         if rating_value > 0:  # Only save valid ratings (1-5)
-                            rating = Rating()
-                            rating.feedback_item_id = feedback_item.id
-                            rating.question_id = question.id
-                            rating.rating_value = rating_value
-                            db.session.add(rating)
-
-                            # Add to totals for sentiment calculation
-                            total_rating += rating_value
-                            rating_count += 1
-
-                    # Calculate average rating for sentiment if we have ratings
-                    # Note: We're not requiring ratings for every question, just using what's provided
-                    if rating_count > 0:
-                        avg_rating = total_rating / rating_count
-
-                        # Assign sentiment based on average rating
-                        # 1-1.8: Very Negative, 1.8-2.6: Negative, 2.6-3.4: Neutral, 3.4-4.2: Positive, 4.2-5: Very Positive
-                        if avg_rating < 1.8:
-                            sentiment_score = 0.1
-                            sentiment_label = "Very Negative"
-                        elif avg_rating < 2.6:
-                            sentiment_score = 0.3
-                            sentiment_label = "Negative"
-                        elif avg_rating < 3.4:
-                            sentiment_score = 0.5
-                            sentiment_label = "Neutral"
-                        elif avg_rating < 4.2:
-                            sentiment_score = 0.7
-                            sentiment_label = "Positive"
-                        else:
-                            sentiment_score = 0.9
-                            sentiment_label = "Very Positive"
-
-                        # Only override sentiment if text analysis didn't already set it
-                        if not feedback_item.sentiment_score:
-                            feedback_item.sentiment_score = sentiment_score
-                            feedback_item.sentiment_label = sentiment_label
+                            ratings[question.id] = rating_value
+
+                # Keep the item's rating totals so reports need not re-read Rating
+                total_rating = sum(ratings.values())
+                item_row = {
+                    'feedback_id': feedback.id,
+                    'category_id': category.id,
+                    'text_feedback': text_feedback,
+                    'rating_sum': total_rating,
+                    'rating_count': len(ratings),
+                    'avg_rating': total_rating / len(ratings) if ratings else None,
+                    'sentiment_score': None,
+                    'sentiment_label': None,
+                    'aspect_based_results': None,
+                    'analysis_status': None,
+                    'analyzer_version': None
+                }
+
+                # Calculate average rating for sentiment if we have ratings
+                # Note: We're not requiring ratings for every question, just using what's provided
+                if ratings:
+                    item_row['sentiment_score'], item_row['sentiment_label'] = rating_sentiment(item_row['avg_rating'])
 
                 # Run BERT analysis on text feedback if provided
-                text_sentiment_score = None
-                text_sentiment_label = None
+                aspects = []
                 if text_feedback:
-                    text_sentiment_score, text_sentiment_label = analyze_text(text_feedback)
-                    aspects = aspect_based_analysis(text_feedback)
-                    feedback_item.aspect_based_results = json.dumps(aspects)
-
-                # Determine final sentiment by combining ratings and text feedback
-                if text_sentiment_score is not None and feedback_item.sentiment_score is not None:
-                    # If we have both rating and text sentiment, use a weighted average (60% text, 40% rating)
-                    combined_score = (text_sentiment_score * 0.6) + (feedback_item.sentiment_score * 0.4)
-
-                    # Determine label from combined score
-                    if combined_score < 0.2:
-                        combined_label = "very negative"
-                    elif combined_score < 0.4:
-                        combined_label = "negative" 
-                    elif combined_score < 0.6:
-                        combined_label = "neutral"
-                    elif combined_score < 0.8:
-                        combined_label = "positive"
+                    if background_analysis:
+                        # Analysis runs after commit; keep the rating-based sentiment until then
+                        item_row['analysis_status'] = ANALYSIS_PENDING
+                        pending_categories.append(category.id)
                     else:
-                        combined_label = "very positive"
-
-                    feedback_item.sentiment_score = combined_score
-                    feedback_item.sentiment_label = combined_label
-
-                elif text_sentiment_score is not None:
-                    # Only text sentiment available
-                    feedback_item.sentiment_score = text_sentiment_score
-                    feedback_item.sentiment_label = text_sentiment_label
+                        # Stamp the item with the version of the lexicon that analyzed it
+                        with pinned_lexicon():
+                            result, ok = get_analysis(text_feedback)
+                            if ok:
+                                item_row.update(analysis_values(result, item_row['sentiment_score']))
+                                aspects = aspect_rows(result[2])
+                            else:
+                                # Keep the rating-based sentiment; without an analyzer
+                                # version the item is retried by reanalyze_stale.py
+                                item_row['analysis_status'] = ANALYSIS_FAILED
 
                 # If no sentiment is set yet (only ratings, no text), the rating-based sentiment from above will remain
+                item_rows.append(item_row)
+                item_children[category.id] = (ratings, text_feedback, aspects)
+
+            # A submission may end up without items (e.g. only an empty "Other"),
+            # which stores the bare Feedback as before
+            item_ids = {}
+            if item_rows:
+                # One multi-row INSERT ... RETURNING gives the item ids; a feedback
+                # has one item per category, so the category identifies each row.
+                # render_nulls keeps the None values so all rows share one statement
+                item_ids = dict(db.session.execute(
+                    insert(FeedbackItem).returning(FeedbackItem.category_id, FeedbackItem.id), item_rows,
+                    execution_options={'render_nulls': True}).all())
+            created_item_ids = list(item_ids.values())
+
+            # Ratings, theme counters and aspects, one executemany per table
+            new_ratings, new_themes, new_aspects = [], [], []
+            for category_id, (ratings, text_feedback, aspects) in item_children.items():
+                item_id = item_ids[category_id]
+                new_ratings.extend({'feedback_item_id': item_id, 'question_id': question_id, 'rating_value': value}
+                                   for question_id, value in ratings.items())
+                new_themes.extend(theme_rows(item_id, text_feedback))
+                new_aspects.extend(dict(row, feedback_item_id=item_id) for row in aspects)
+            for model, rows in ((Rating, new_ratings), (FeedbackTheme, new_themes), (FeedbackAspect, new_aspects)):
+                if rows:
+                    db.session.execute(insert(model), rows)
 
             # Create initial response record (pending status)
             # Assign to CC by default
@@ -592,7 +581,12 @@ def submit_feedback():
                 response.status = STATUS_PENDING
                 db.session.add(response)
 
+            # Add the new items to the daily rollups in the same transaction
+            add_items(created_item_ids)
+
             db.session.commit()
+            if pending_categories:
+                analysis_queue.enqueue([item_ids[category_id] for category_id in pending_categories])
             flash('Your feedback has been submitted successfully!', 'success')
             return redirect(url_for('dashboard_student'))
 
@@ -602,9 +596,7 @@ def submit_feedback():
             flash('An error occurred while submitting your feedback.', 'danger')
 
     # GET method - display feedback form
-    categories = Category.query.all()
-
-    return render_template('feedback_form.html', categories=categories)
+    return render_template('feedback_form.html', categories=get_catalog().categories)
 
 
 @app.route('/feedback/track')
@@ -614,19 +606,51 @@ def track_feedback():
         flash('Access denied. Students only.', 'danger')
         return redirect(url_for('index'))
 
-    # Get all feedback by the student
-    feedbacks = (Feedback.query
-                .filter_by(student_id=current_user.id)
-                .order_by(Feedback.submission_date.desc())
-                .all())
+    # One page of the student's feedback, newest first
+    try:
+        feedbacks, next_cursor = student_feedback_page(request.args.get('cursor'))
+    except ValueError:
+        abort(400)
+
+    return render_template('feedback_tracking.html', feedbacks=feedbacks, next_cursor=next_cursor)
+
+
+def student_feedback_page(cursor):
+    """Return (feedbacks, next_cursor) for the current student's feedback"""
+    query = (Feedback.query
+             .options(*feedback_list_options())
+             .filter_by(student_id=current_user.id))
+    return keyset_page(query, Feedback.submission_date, Feedback.id, cursor, app.config['PAGE_SIZE'])
+
+
+@app.route('/api/feedback/track')
+@login_required
+def api_track_feedback():
+    if not current_user.is_student():
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    try:
+        feedbacks, next_cursor = student_feedback_page(request.args.get('cursor'))
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
 
-    return render_template('feedback_tracking.html', feedbacks=feedbacks)
+    return jsonify({
+        'feedback': [{
+            'id': feedback.id,
+            'submission_date': feedback.submission_date.isoformat(),
+            'is_anonymous': feedback.is_anonymous,
+            'categories': [item.category.name for item in feedback.items],
+            'status': feedback.responses[0].status if feedback.responses else STATUS_PENDING,
+            'url': url_for('view_feedback', feedback_id=feedback.id)
+        } for feedback in feedbacks],
+        'next_cursor': next_cursor
+    })
 
 
 @app.route('/feedback/view/<int:feedback_id>')
 @login_required
 def view_feedback(feedback_id):
-    feedback = Feedback.query.get_or_404(feedback_id)
+    feedback = Feedback.query.options(*feedback_list_options()).get_or_404(feedback_id)
 
     # Check permissions
     if current_user.is_student() and feedback.student_id != current_user.id:
@@ -662,20 +686,20 @@ def view_feedback(feedback_id):
             return redirect(url_for('dashboard_staff'))
 
     # Get feedback items and responses
-    feedback_items = FeedbackItem.query.filter_by(feedback_id=feedback.id).all()
+    feedback_items = FeedbackItem.query.options(*feedback_item_options()).filter_by(feedback_id=feedback.id).all()
 
     # Filter responses based on role permissions
     if current_user.is_student():
         # Students see all responses to their feedback
-        responses = Response.query.filter_by(feedback_id=feedback.id).order_by(Response.response_date).all()
+        responses = Response.query.options(*response_options()).filter_by(feedback_id=feedback.id).order_by(Response.response_date).all()
     elif current_user.is_cc():
         # CC sees all responses for this feedback
-        responses = Response.query.filter_by(feedback_id=feedback.id).order_by(Response.response_date).all()
+        responses = Response.query.options(*response_options()).filter_by(feedback_id=feedback.id).order_by(Response.response_date).all()
     elif current_user.is_hod():
         # HOD sees all CC responses, any responses forwarded to them, and their own responses
         # Also sees principal responses if the feedback was forwarded by HOD to principal
         hod_visible_responses = []
-        all_responses = Response.query.filter_by(feedback_id=feedback.id).order_by(Response.response_date).all()
+        all_responses = Response.query.options(*response_options()).filter_by(feedback_id=feedback.id).order_by(Response.response_date).all()
 
         # Track if HOD forwarded to Principal
         hod_forwarded_to_principal = False
@@ -699,7 +723,7 @@ def view_feedback(feedback_id):
         # Principal sees responses from HOD or CC forwarded to them, plus their own responses
         # Also sees the response chain that led to them being involved
         principal_visible_responses = []
-        all_responses = Response.query.filter_by(feedback_id=feedback.id).order_by(Response.response_date).all()
+        all_responses = Response.query.options(*response_options()).filter_by(feedback_id=feedback.id).order_by(Response.response_date).all()
 
         # Check if any response is forwarded to principal
         forwarded_to_principal = False
@@ -900,10 +924,43 @@ def manage_students():
         flash('Student added successfully.', 'success')
         return redirect(url_for('manage_students'))
 
-    # Get all students in the CC's department
-    students = User.query.filter_by(role=ROLE_STUDENT, department=current_user.department).all()
+    # One page of the students in the CC's department, newest first
+    try:
+        students, next_cursor = department_students_page(request.args.get('cursor'))
+    except ValueError:
+        abort(400)
+
+    return render_template('manage_students.html', students=students, next_cursor=next_cursor)
 
-    return render_template('manage_students.html', students=students)
+
+def department_students_page(cursor):
+    """Return (students, next_cursor) for the current CC's department"""
+    query = User.query.filter_by(role=ROLE_STUDENT, department=current_user.department)
+    return keyset_page(query, User.date_joined, User.id, cursor, app.config['PAGE_SIZE'])
+
+
+@app.route('/api/students')
+@login_required
+def api_students():
+    if not current_user.is_cc():
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    try:
+        students, next_cursor = department_students_page(request.args.get('cursor'))
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
+
+    return jsonify({
+        'students': [{
+            'id': student.id,
+            'username': student.username,
+            'email': student.email,
+            'roll_number': student.roll_number,
+            'department': student.department,
+            'date_joined': student.date_joined.isoformat()
+        } for student in students],
+        'next_cursor': next_cursor
+    })
 
 
 @app.route('/direct_message', methods=['GET', 'POST'])
@@ -951,6 +1008,7 @@ def direct_message():
             dm.parent_message_id = original_message_id
 
         db.session.add(dm)
+        unread_counters.message_sent(dm.recipient_id)
         db.session.commit()
 
         flash('Message sent successfully.', 'success')
@@ -961,9 +1019,10 @@ def direct_message():
 
         return redirect(url_for('direct_message'))
 
-    # GET request - show inbox/sent messages
-    received_messages = DirectMessage.query.filter_by(recipient_id=current_user.id).order_by(DirectMessage.sent_date.desc()).all()
-    sent_messages = DirectMessage.query.filter_by(sender_id=current_user.id).order_by(DirectMessage.sent_date.desc()).all()
+    # GET request - show the newest page of inbox/sent messages (older
+    # pages come from /api/messages/<box>)
+    received_messages, _ = message_page('received', None)
+    sent_messages, _ = message_page('sent', None)
 
     # Get potential recipients based on role
     if current_user.is_student():
@@ -989,6 +1048,39 @@ def direct_message():
                           recipients=recipients)
 
 
+def message_page(box, cursor):
+    """Return (messages, next_cursor) for the current user's 'received' or 'sent' box"""
+    query = DirectMessage.query.options(*message_options())
+    if box == 'received':
+        query = query.filter_by(recipient_id=current_user.id)
+    else:
+        query = query.filter_by(sender_id=current_user.id)
+    return keyset_page(query, DirectMessage.sent_date, DirectMessage.id, cursor, app.config['PAGE_SIZE'])
+
+
+@app.route('/api/messages/<any(received, sent):box>')
+@login_required
+def api_messages(box):
+    try:
+        messages, next_cursor = message_page(box, request.args.get('cursor'))
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
+
+    return jsonify({
+        'messages': [{
+            'id': message.id,
+            'sender_id': message.sender_id,
+            'sender_name': message.sender.username,
+            'recipient_id': message.recipient_id,
+            'recipient_name': message.recipient.username,
+            'message': message.message,
+            'is_read': message.is_read,
+            'sent_date': message.sent_date.isoformat()
+        } for message in messages],
+        'next_cursor': next_cursor
+    })
+
+
 @app.route('/api/mark_message_read/<int:message_id>', methods=['POST'])
 @login_required
 def mark_message_read(message_id):
@@ -999,7 +1091,7 @@ def mark_message_read(message_id):
         return jsonify({'success': False, 'error': 'Unauthorized'}), 403
 
     try:
-        message.is_read = True
+        unread_counters.mark_read(message.id, current_user.id)
         db.session.commit()
         return jsonify({'success': True})
     except Exception as e:
@@ -1009,6 +1101,7 @@ def mark_message_read(message_id):
 
 @app.route('/api/feedback/analytics')
 @login_required
+@uses_analytics_db
 def feedback_analytics():
     if not current_user.is_staff():
         return jsonify({'error': 'Unauthorized'}), 403
@@ -1052,25 +1145,26 @@ def feedback_analytics():
         ).filter(Category.name == category_filter)
 
     # Get all categories for filter UI
-    all_categories = Category.query.all()
-    category_list = [{'id': cat.id, 'name': cat.name} for cat in all_categories]
+    category_list = [{'id': cat.id, 'name': cat.name} for cat in get_catalog().categories]
 
     # Category-wise average ratings with question subcategories
     category_ratings = []
     question_ratings = []
 
+    # Ratings and sentiment come from the daily rollups for the covered days
+    from_day = from_date.date()
+    to_day = (to_date - timedelta(microseconds=1)).date()
+
     # Get main category ratings
-    category_avg_query = (db.session.query(
+    category_avg_query = (rollup_query(
                         Category.id,
-                        Category.name, 
-                        func.avg(Rating.rating_value).label('avg_rating'),
-                        func.count(distinct(Rating.id)).label('rating_count'))
-                      .join(FeedbackItem, Category.id == FeedbackItem.category_id)
-                      .join(Rating, FeedbackItem.id == Rating.feedback_item_id)
-                      .join(Feedback, FeedbackItem.feedback_id == Feedback.id)
-                      .filter(Feedback.submission_date >= from_date,
-                             Feedback.submission_date <= to_date)
-                      .group_by(Category.id, Category.name))
+                        Category.name,
+                        rollup_average(),
+                        func.sum(DailyRollup.rating_count).label('rating_count'),
+                        from_day=from_day, to_day=to_day)
+                      .join(Category, DailyRollup.category_id == Category.id)
+                      .group_by(Category.id, Category.name)
+                      .having(func.sum(DailyRollup.rating_count) > 0))
 
     # Apply category filter if provided
     if category_filter:
@@ -1079,22 +1173,20 @@ def feedback_analytics():
     category_ratings = category_avg_query.all()
 
     # Get question level ratings (subcategories)
-    question_avg_query = (db.session.query(
+    question_avg_query = (rollup_query(
                         Category.id.label('category_id'),
                         Category.name.label('category_name'),
                         Question.id.label('question_id'),
                         Question.text.label('question_text'),
-                        func.avg(Rating.rating_value).label('avg_rating'),
-                        func.count(distinct(Rating.id)).label('rating_count'))
-                      .join(Question, Category.id == Question.category_id)
-                      .join(FeedbackItem, Category.id == FeedbackItem.category_id)
-                      .join(Rating, and_(FeedbackItem.id == Rating.feedback_item_id, 
-                                      Question.id == Rating.question_id))
-                      .join(Feedback, FeedbackItem.feedback_id == Feedback.id)
-                      .filter(Feedback.submission_date >= from_date,
-                             Feedback.submission_date <= to_date)
-                      .group_by(Category.id, Category.name, 
-                               Question.id, Question.text))
+                        rollup_average(),
+                        func.sum(DailyRollup.rating_count).label('rating_count'),
+                        from_day=from_day, to_day=to_day, questions=True)
+                      .join(Category, DailyRollup.category_id == Category.id)
+                      .join(Question, and_(DailyRollup.question_id == Question.id,
+                                           Question.category_id == Category.id))
+                      .group_by(Category.id, Category.name,
+                               Question.id, Question.text)
+                      .having(func.sum(DailyRollup.rating_count) > 0))
 
     # Apply category filter if provided
     if category_filter:
@@ -1146,25 +1238,26 @@ def feedback_analytics():
             })
 
     # Sentiment distribution
-    sentiment_counts_query = (db.session.query(
-                            FeedbackItem.sentiment_label,
-                            func.count(FeedbackItem.id))
-                          .filter(FeedbackItem.sentiment_label.isnot(None))
-                          .join(Feedback, FeedbackItem.feedback_id == Feedback.id)
-                          .filter(Feedback.submission_date >= from_date,
-                                 Feedback.submission_date <= to_date))
+    sentiment_counts_query = (rollup_query(
+                            DailyRollup.sentiment_label,
+                            func.sum(DailyRollup.item_count),
+                            from_day=from_day, to_day=to_day)
+                          .filter(DailyRollup.sentiment_label != ''))
 
     # Apply category filter if provided
     if category_filter:
         sentiment_counts_query = sentiment_counts_query.join(
-            Category, FeedbackItem.category_id == Category.id
+            Category, DailyRollup.category_id == Category.id
         ).filter(Category.name == category_filter)
 
-    sentiment_counts = sentiment_counts_query.group_by(FeedbackItem.sentiment_label).all()
+    sentiment_counts = (sentiment_counts_query
+                        .group_by(DailyRollup.sentiment_label)
+                        .having(func.sum(DailyRollup.item_count) > 0)
+                        .all())
 
-    # Feedback counts over time (grouped by week)
+    # Feedback counts over time (grouped by the stored ISO week)
     feedback_trend_query = (db.session.query(
-                          func.strftime('%Y-%W', Feedback.submission_date).label('week'),
+                          Feedback.submission_week.label('week'),
                           func.count(Feedback.id))
                          .filter(Feedback.submission_date >= from_date,
                                 Feedback.submission_date <= to_date))
@@ -1179,7 +1272,10 @@ def feedback_analytics():
             Feedback.id.in_(feedback_ids_with_category)
         )
 
-    feedback_trend = feedback_trend_query.group_by('week').order_by('week').all()
+    feedback_trend = (feedback_trend_query
+                      .group_by(Feedback.submission_week)
+                      .order_by(Feedback.submission_week)
+                      .all())
 
     return jsonify({
         'filters': {
@@ -1195,6 +1291,19 @@ def feedback_analytics():
     })
 
 
+@app.route('/api/analysis/cache_stats')
+@login_required
+def analysis_cache_stats():
+    """Counters of this worker's in-process text analysis cache"""
+    if not current_user.is_staff():
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    stats = cache_stats()
+    stats['micro_batch'] = scheduler_stats()
+    stats['worker_pid'] = os.getpid()
+    return jsonify(stats)
+
+
 @app.route('/debug/users')
 def debug_users():
     """Debugging route to check users in the database"""
@@ -1303,6 +1412,7 @@ def api_areas_of_improvement():
 
 @app.route('/download_report')
 @login_required
+@uses_analytics_db
 def download_report():
     if not current_user.is_staff():
         flash('Access denied. Staff only.', 'danger')
@@ -1323,6 +1433,7 @@ def download_report():
     if current_user.is_cc():
         # For CC, get all feedback from their department
         feedbacks = (Feedback.query
+                   .options(*feedback_list_options())
                    .join(User, Feedback.student_id == User.id)
                    .filter(User.department == current_user.department)
                    .order_by(Feedback.submission_date.desc())
@@ -1330,6 +1441,7 @@ def download_report():
     elif current_user.is_hod() or current_user.is_principal():
         # For HOD/Principal, get feedback that was forwarded to them
         feedbacks = (Feedback.query
+                    .options(*feedback_list_options())
                     .join(Response, Feedback.id == Response.feedback_id)
                     .filter(Response.forwarded_to == current_user.id)
                     .order_by(Feedback.submission_date.desc())
@@ -1346,11 +1458,8 @@ def download_report():
         for item in feedback.items:
             category_name = item.category.name
 
-            # Calculate average rating for this category
-            ratings = Rating.query.filter_by(feedback_item_id=item.id).all()
-            avg_rating = sum(r.rating_value for r in ratings) / len(ratings) if ratings else 'N/A'
-            if isinstance(avg_rating, (int, float)):
-                avg_rating = f"{avg_rating:.2f}"
+            # Average rating for this category, stored on the item at submission
+            avg_rating = f"{item.avg_rating:.2f}" if item.rating_count else 'N/A'
 
             sentiment = item.sentiment_label.capitalize() if item.sentiment_label else 'N/A'
             comments = item.text_feedback if item.text_feedback else 'No comments'
@@ -1402,45 +1511,39 @@ def areas_of_improvement():
     days = request.args.get('days', 30, type=int)
     from_date = datetime.now() - timedelta(days=days)
 
-    # Get categories with lowest average ratings
+    # Get categories with lowest average ratings, from the stored item totals
+    category_avg = (cast(func.sum(FeedbackItem.rating_sum), Float) /
+                    func.nullif(func.sum(FeedbackItem.rating_count), 0))
     low_rated_categories = (db.session.query(
                            Category.name,
-                           func.avg(Rating.rating_value).label('avg_rating'))
+                           category_avg.label('avg_rating'))
                           .join(FeedbackItem, Category.id == FeedbackItem.category_id)
-                          .join(Rating, FeedbackItem.id == Rating.feedback_item_id)
                           .join(Feedback, FeedbackItem.feedback_id == Feedback.id)
                           .join(User, Feedback.student_id == User.id)
                           .filter(Feedback.submission_date >= from_date)
                           .filter(User.department == current_user.department)
                           .group_by(Category.name)
-                          .order_by(func.avg(Rating.rating_value).asc())
+                          .having(func.sum(FeedbackItem.rating_count) > 0)
+                          .order_by(category_avg.asc())
                           .limit(3)
                           .all())
 
-    # Get aspects with most negative sentiment
-    negative_aspects = []
-    feedback_items = (FeedbackItem.query
-                     .join(Feedback, FeedbackItem.feedback_id == Feedback.id)
-                     .join(User, Feedback.student_id == User.id)
-                     .filter(User.department == current_user.department)
-                     .filter(Feedback.submission_date >= from_date)
-                     .filter(FeedbackItem.sentiment_label == 'negative')
-                     .filter(FeedbackItem.aspect_based_results.isnot(None))
-                     .all())
-
-    aspect_counts = {}
-    for item in feedback_items:
-        if item.aspect_based_results:
-            try:
-                aspects = json.loads(item.aspect_based_results)
-                for aspect, data in aspects.items():
-                    if data.get('sentiment') == 'negative':
-                        aspect_counts[aspect] = aspect_counts.get(aspect, 0) + 1
-            except:
-                pass
-
-    # Sort aspects by count
-    negative_aspects = sorted(aspect_counts.items(), key=lambda x: x[1], reverse=True)[:5]
+    # Get aspects with most negative sentiment, counted in the database
+    # over the normalized aspect rows (ix_feedback_aspect_aspect_sentiment)
+    negative_aspects = (db.session.query(
+                        FeedbackAspect.aspect,
+                        func.count(FeedbackAspect.id).label('count'))
+                       .join(FeedbackItem, FeedbackAspect.feedback_item_id == FeedbackItem.id)
+                       .join(Feedback, FeedbackItem.feedback_id == Feedback.id)
+                       .join(User, Feedback.student_id == User.id)
+                       .filter(FeedbackAspect.sentiment == 'negative')
+                       .filter(User.department == current_user.department)
+                       .filter(Feedback.submission_date >= from_date)
+                       .filter(FeedbackItem.sentiment_label == 'negative')
+                       .group_by(FeedbackAspect.aspect)
+                       .order_by(desc('count'), FeedbackAspect.aspect)
+                       .limit(5)
+                       .all())
 
     return jsonify({
         'low_rated_categories': [{
@@ -1456,6 +1559,7 @@ def areas_of_improvement():
 
 @app.route('/sentiment_trends')
 @login_required
+@uses_analytics_db
 def sentiment_trends():
     """Endpoint to get sentiment trends over time for visualization"""
     if not current_user.is_staff():
@@ -1470,37 +1574,36 @@ def sentiment_trends():
     # Determine date range
     from_date = datetime.now() - timedelta(days=days)
 
-    # Base query - filter by date
-    query = (db.session.query(
-            func.date_trunc(period, Feedback.submission_date).label('period'),
-            FeedbackItem.sentiment_label,
-            func.count(FeedbackItem.id).label('count')
-        )
-        .join(Feedback, FeedbackItem.feedback_id == Feedback.id)
-        .filter(Feedback.submission_date >= from_date)
+    # Base query - daily sentiment counts from the rollups
+    query = (rollup_query(
+            DailyRollup.day,
+            DailyRollup.sentiment_label,
+            func.sum(DailyRollup.item_count).label('count'),
+            from_day=from_date.date())
+        .filter(DailyRollup.sentiment_label != '')
     )
 
     # Apply department filter for CC users
     if current_user.is_cc() or department:
         dept = department or current_user.department
-        query = query.join(User, Feedback.student_id == User.id).filter(User.department == dept)
+        query = query.filter(DailyRollup.department == dept)
 
-    # Group by period and sentiment
+    # Group by day and sentiment; days are bucketed into periods below
     results = (query
-        .group_by(func.date_trunc(period, Feedback.submission_date), FeedbackItem.sentiment_label)
-        .order_by(func.date_trunc(period, Feedback.submission_date))
+        .group_by(DailyRollup.day, DailyRollup.sentiment_label)
+        .order_by(DailyRollup.day)
         .all()
     )
 
     # Format results for visualization
     trends = {}
-    for period_date, sentiment, count in results:
-        period_str = period_date.strftime('%Y-%m')
+    for day, sentiment, count in results:
+        period_str = period_start(day, period).strftime('%Y-%m')
         if period_str not in trends:
             trends[period_str] = {'positive': 0, 'neutral': 0, 'negative': 0}
 
         if sentiment in trends[period_str]:
-            trends[period_str][sentiment] = count
+            trends[period_str][sentiment] += count
 
     # Fill in missing periods
     all_periods = []
@@ -1581,65 +1684,17 @@ def ai_feedback_suggestions():
     if category_id:
         query = query.filter(FeedbackItem.category_id == category_id)
 
-    # Get negative feedback items
-    feedback_items = query.all()
-
-    # Collect text feedback for analysis
-    all_feedback = " ".join([item.text_feedback for item in feedback_items if item.text_feedback])
-
-    # Generate suggestions based on common themes in feedback
-    suggestions = []
-
-    if all_feedback:
-        # Extract common themes and issues
-        # This would use more sophisticated AI in a production system
-        # For now, we'll use a simplified approach based on keyword matching
-
-        # Define keywords for common issues and corresponding suggestions
-        improvement_areas = {
-            'difficult': {
-                'theme': 'Complexity',
-                'suggestion': 'Consider simplifying complex topics and providing more scaffolded learning materials.'
-            },
-            'confusing': {
-                'theme': 'Clarity',
-                'suggestion': 'Review explanations for clarity and provide more visual aids or examples.'
-            },
-            'slow': {
-                'theme': 'Pacing',
-                'suggestion': 'Evaluate the pacing of instruction and consider offering additional resources for self-paced learning.'
-            },
-            'boring': {
-                'theme': 'Engagement',
-                'suggestion': 'Incorporate more interactive activities and real-world applications to increase engagement to increase engagement.'
-            },
-            'outdated': {
-                'theme': 'Relevance',
-                'suggestion': 'Update materials with current industry practices and technologies.'
-            },
-            'hard': {
-                'theme': 'Difficulty',
-                'suggestion': 'Consider providing additional practice opportunities and more graduated difficulty levels.'
-            },
-            'too much': {
-                'theme': 'Workload',
-                'suggestion': 'Review the workload and consider adjusting assignment deadlines or requirements.'
-            }
-        }
-
-        # Check for keywords in feedback
-        for keyword, data in improvement_areas.items():
-            if keyword in all_feedback.lower():
-                # Count occurrences to prioritize suggestions
-                count = all_feedback.lower().count(keyword)
-                suggestions.append({
-                    'theme': data['theme'],
-                    'suggestion': data['suggestion'],
-                    'relevance': count
-                })
+    # Count negative feedback items
+    feedback_count = query.count()
 
-        # Sort by relevance (occurrence count)
-        suggestions = sorted(suggestions, key=lambda x: x['relevance'], reverse=True)
+    # Generate suggestions based on common themes in feedback, summing the
+    # keyword counters stored for each item at submission time
+    theme_counts = dict(query
+        .join(FeedbackTheme, FeedbackTheme.feedback_item_id == FeedbackItem.id)
+        .with_entities(FeedbackTheme.keyword, func.sum(FeedbackTheme.hit_count))
+        .group_by(FeedbackTheme.keyword)
+        .all())
+    suggestions = theme_suggestions(theme_counts)
 
     # If no specific suggestions, provide general ones
     if not suggestions:
@@ -1658,13 +1713,14 @@ def ai_feedback_suggestions():
 
     return jsonify({
         'suggestions': suggestions,
-        'feedback_count': len(feedback_items),
+        'feedback_count': feedback_count,
         'days': days
     })
 
 
 @app.route('/generate_pdf_report')
 @login_required
+@uses_analytics_db
 def generate_pdf_report():
     """Generate a comprehensive PDF report with visualization and analysis"""
     from flask import Response as FlaskResponse
@@ -1684,9 +1740,14 @@ def generate_pdf_report():
 
     # Base query filters
     department_filter = None
+    rollup_department = None
     if current_user.is_cc() or department:
         dept = department or current_user.department
         department_filter = User.department == dept
+        rollup_department = dept
+
+    # Ratings and sentiment come from the daily rollups, whole days
+    from_day = from_date.date()
 
     # Get total feedback count
     query = Feedback.query.filter(Feedback.submission_date >= from_date)
@@ -1695,19 +1756,13 @@ def generate_pdf_report():
     total_feedback = query.count()
 
     # Get sentiment summary
-    query = (db.session.query(
-            FeedbackItem.sentiment_label,
-            func.count(FeedbackItem.id).label('count')
-        )
-        .join(Feedback, FeedbackItem.feedback_id == Feedback.id)
-        .filter(Feedback.submission_date >= from_date)
-    )
-
-    if department_filter is not None:
-        query = query.join(User, Feedback.student_id == User.id).filter(department_filter)
+    query = rollup_query(
+            DailyRollup.sentiment_label,
+            func.sum(DailyRollup.item_count).label('count'),
+            from_day=from_day, department=rollup_department)
 
     sentiment_counts = {label: 0 for label in ['positive', 'neutral', 'negative']}
-    results = query.group_by(FeedbackItem.sentiment_label).all()
+    results = query.group_by(DailyRollup.sentiment_label).all()
 
     total_with_sentiment = 0
     for label, count in results:
@@ -1738,20 +1793,15 @@ def generate_pdf_report():
     category_ratings = {}
     category_details = {}
 
-    query = (db.session.query(
+    query = (rollup_query(
             Category.name,
-            func.avg(Rating.rating_value).label('avg_rating'),
-            func.count(Rating.id).label('count')
-        )
-        .join(FeedbackItem, Category.id == FeedbackItem.category_id)
-        .join(Rating, FeedbackItem.id == Rating.feedback_item_id)
-        .join(Feedback, FeedbackItem.feedback_id == Feedback.id)
-        .filter(Feedback.submission_date >= from_date)
+            rollup_average(),
+            func.sum(DailyRollup.rating_count).label('count'),
+            from_day=from_day, department=rollup_department)
+        .join(Category, DailyRollup.category_id == Category.id)
+        .having(func.sum(DailyRollup.rating_count) > 0)
     )
 
-    if department_filter is not None:
-        query = query.join(User, Feedback.student_id == User.id).filter(department_filter)
-
     results = query.group_by(Category.name).all()
 
     for category_name, avg_rating, count in results:
@@ -1764,21 +1814,16 @@ def generate_pdf_report():
         }
 
     # Get sentiment breakdown by category
-    query = (db.session.query(
+    query = (rollup_query(
             Category.name,
-            FeedbackItem.sentiment_label,
-            func.count(FeedbackItem.id).label('count')
-        )
-        .join(Category, FeedbackItem.category_id == Category.id)
-        .join(Feedback, FeedbackItem.feedback_id == Feedback.id)
-        .filter(Feedback.submission_date >= from_date)
-        .filter(FeedbackItem.sentiment_label.isnot(None))
+            DailyRollup.sentiment_label,
+            func.sum(DailyRollup.item_count).label('count'),
+            from_day=from_day, department=rollup_department)
+        .join(Category, DailyRollup.category_id == Category.id)
+        .filter(DailyRollup.sentiment_label != '')
     )
 
-    if department_filter is not None:
-        query = query.join(User, Feedback.student_id == User.id).filter(department_filter)
-
-    results = query.group_by(Category.name, FeedbackItem.sentiment_label).all()
+    results = query.group_by(Category.name, DailyRollup.sentiment_label).all()
 
     for category_name, sentiment, count in results:
         if category_name in category_details:
@@ -1860,12 +1905,8 @@ def internal_server_error(e):
 @app.route('/api/check_new_messages')
 @login_required
 def check_new_messages():
-    unread_count = DirectMessage.query.filter_by(
-        recipient_id=current_user.id,
-        is_read=False
-    ).count()
-
-    return jsonify({'new_messages': unread_count})
+    # Stored counter on the already loaded user row, no query of its own
+    return jsonify({'new_messages': max(current_user.unread_message_count or 0, 0)})
 @app.route('/manage/courses', methods=['GET', 'POST'])
 @login_required
 def manage_courses():
@@ -1883,6 +1924,7 @@ def manage_courses():
             course = Course(name=course_name, staff_id=staff_id, category_id=category_id)
             db.session.add(course)
             db.session.commit()
+            invalidate_catalog()
             flash('Course added successfully.', 'success')
 
         elif action == 'delete':
@@ -1890,11 +1932,12 @@ def manage_courses():
             course = Course.query.get_or_404(course_id)
             db.session.delete(course)
             db.session.commit()
+            invalidate_catalog()
             flash('Course deleted successfully.', 'success')
 
     courses = Course.query.all()
     staff = Staff.query.all()
-    categories = Category.query.all()
+    categories = get_catalog().categories
     return render_template('manage_courses.html', courses=courses, staff=staff, categories=categories)
 
 @app.route('/manage/staff', methods=['GET', 'POST'])
@@ -0,0 +1,104 @@
+"""
+SQLite performance profile applied to every new database connection
+
+With the default rollback journal, a writer locks out all readers, so
+several gunicorn workers sharing feedback_system.db fail with "database is
+locked". The profile switches to WAL (readers and one writer run side by
+side), waits for locks instead of failing at once, and sizes the page cache
+and memory map. Each setting can be overridden through the environment;
+SQLITE_PROFILE=off keeps SQLite's defaults.
+"""
+import logging
+import os
+import sqlite3
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# PRAGMA name -> (environment variable, default), applied in this order
+PRAGMA_SETTINGS = [
+    ('journal_mode', 'SQLITE_JOURNAL_MODE', 'WAL'),
+    ('busy_timeout', 'SQLITE_BUSY_TIMEOUT_MS', '5000'),
+    ('synchronous', 'SQLITE_SYNCHRONOUS', 'NORMAL'),
+    ('mmap_size', 'SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)),
+    ('cache_size', 'SQLITE_CACHE_SIZE', '-65536'),  # negative: KiB, i.e. 64 MiB
+    ('temp_store', 'SQLITE_TEMP_STORE', 'MEMORY'),
+]
+
+# How PRAGMA queries report the symbolic settings
+SYNCHRONOUS_NAMES = {0: 'OFF', 1: 'NORMAL', 2: 'FULL', 3: 'EXTRA'}
+TEMP_STORE_NAMES = {0: 'DEFAULT', 1: 'FILE', 2: 'MEMORY'}
+
+
+def profile_from_env():
+    """Return the configured profile as {pragma: value}, empty when disabled"""
+    if os.environ.get('SQLITE_PROFILE', 'production').lower() in ('off', 'none', 'default'):
+        return {}
+    return {pragma: os.environ.get(variable, default) for pragma, variable, default in PRAGMA_SETTINGS}
+
+
+def apply_profile(dbapi_connection, profile):
+    """Run the profile's PRAGMAs on a raw DB-API connection"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma, value in profile.items():
+            cursor.execute(f"PRAGMA {pragma}={value}")
+    finally:
+        cursor.close()
+
+
+def install(engine, profile, read_only=False):
+    """
+    Apply profile to every connection the engine opens (no-op for other
+    databases)
+
+    read_only engines (e.g. a snapshot opened with mode=ro) skip
+    journal_mode, which only a writer can change.
+    """
+    if read_only:
+        profile = {pragma: value for pragma, value in profile.items() if pragma != 'journal_mode'}
+    if engine.dialect.name != 'sqlite' or not profile:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        if isinstance(dbapi_connection, sqlite3.Connection):
+            apply_profile(dbapi_connection, profile)
+
+
+def effective_settings(engine):
+    """Return {pragma: value} as reported by a connection of the engine"""
+    settings = {}
+    with engine.connect() as conn:
+        for pragma, _, _ in PRAGMA_SETTINGS:
+            value = conn.exec_driver_sql(f"PRAGMA {pragma}").scalar()
+            if pragma == 'synchronous':
+                value = SYNCHRONOUS_NAMES.get(value, value)
+            elif pragma == 'temp_store':
+                value = TEMP_STORE_NAMES.get(value, value)
+            settings[pragma] = value
+    return settings
+
+
+def check_profile(engine, profile):
+    """
+    Log the SQLite settings in effect and warn about requested ones that
+    did not take (e.g. WAL on a filesystem without shared memory)
+
+    Returns:
+        dict: The effective settings (empty for other databases)
+    """
+    if engine.dialect.name != 'sqlite':
+        return {}
+
+    settings = effective_settings(engine)
+    logger.info("SQLite settings: " + ", ".join(f"{name}={value}" for name, value in settings.items()))
+    if engine.url.database in (None, '', ':memory:'):
+        return settings
+
+    for pragma, requested in profile.items():
+        actual = str(settings[pragma])
+        if actual.lower() != str(requested).lower():
+            logger.warning(f"SQLite {pragma} is {actual}, not the requested {requested}")
+    return settings
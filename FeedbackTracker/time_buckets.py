@@ -0,0 +1,58 @@
+"""
+Calendar buckets stored on each Feedback row
+
+Trend and "today" queries group and filter on these stored, indexed columns
+instead of date functions such as date_trunc (PostgreSQL only) or strftime
+(SQLite only), so they run the same way and give the same results on both
+databases.
+"""
+from datetime import datetime
+
+# The academic year starts in June; the odd term runs June-November and the
+# even term December-May
+ACADEMIC_YEAR_START_MONTH = 6
+ACADEMIC_TERM_MONTHS = 6
+
+
+def iso_week(day):
+    """ISO week as 'YYYY-WW', e.g. '2024-01' (the ISO year can differ from day.year)"""
+    year, week, _ = day.isocalendar()
+    return f"{year}-{week:02d}"
+
+
+def month(day):
+    """Month as 'YYYY-MM'"""
+    return f"{day.year}-{day.month:02d}"
+
+
+def quarter(day):
+    """Calendar quarter as 'YYYY-Qn'"""
+    return f"{day.year}-Q{(day.month - 1) // 3 + 1}"
+
+
+def academic_term(day):
+    """Academic term as 'YYYY-YY/Tn', e.g. '2024-25/T1' for September 2024"""
+    months_in = (day.month - ACADEMIC_YEAR_START_MONTH) % 12
+    start_year = day.year if day.month >= ACADEMIC_YEAR_START_MONTH else day.year - 1
+    term = months_in // ACADEMIC_TERM_MONTHS + 1
+    return f"{start_year}-{(start_year + 1) % 100:02d}/T{term}"
+
+
+def buckets(moment):
+    """
+    Return the stored bucket columns for a submission time
+
+    Args:
+        moment (datetime): Submission time (None for now)
+
+    Returns:
+        dict: Feedback column name -> value
+    """
+    day = (moment or datetime.utcnow()).date()
+    return {
+        'submission_day': day,
+        'submission_week': iso_week(day),
+        'submission_month': month(day),
+        'submission_quarter': quarter(day),
+        'academic_term': academic_term(day),
+    }
@@ -0,0 +1,79 @@
+"""
+Materialized unread-message counters on User
+
+Every open page polls /api/check_new_messages, so the unread count is kept
+on the recipient's User row (already loaded for the request) instead of
+being counted over DirectMessage each time. The counter is adjusted in the
+transaction that sends a message or marks one read, with increments done
+inside the database so concurrent requests never lose each other's changes.
+reconcile_unread_counts() recomputes the counters from DirectMessage and
+corrects any drift (see reconcile_unread_counts.py).
+"""
+import logging
+
+from sqlalchemy import and_, func, select, update
+
+from app import db
+from models import DirectMessage, User
+
+logger = logging.getLogger(__name__)
+
+
+def message_sent(recipient_id):
+    """Count one more unread message for recipient_id, in the caller's transaction"""
+    db.session.execute(update(User)
+                       .where(User.id == recipient_id)
+                       .values(unread_message_count=User.unread_message_count + 1))
+
+
+def mark_read(message_id, recipient_id):
+    """
+    Mark a message read and update its recipient's counter, in the caller's
+    transaction
+
+    Only an update that actually flips is_read decrements the counter, so
+    repeated or concurrent requests for the same message count once.
+
+    Returns:
+        bool: True if the message was unread
+    """
+    flipped = db.session.execute(update(DirectMessage)
+                                 .where(DirectMessage.id == message_id,
+                                        DirectMessage.recipient_id == recipient_id,
+                                        DirectMessage.is_read.is_(False))
+                                 .values(is_read=True)).rowcount
+    if flipped:
+        db.session.execute(update(User)
+                           .where(User.id == recipient_id)
+                           .values(unread_message_count=User.unread_message_count - flipped))
+    return bool(flipped)
+
+
+def unread_count_subquery():
+    """Correlated count of the unread DirectMessages of each User row"""
+    return (select(func.count(DirectMessage.id))
+            .where(DirectMessage.recipient_id == User.id, DirectMessage.is_read.is_(False))
+            .scalar_subquery())
+
+
+def reconcile_unread_counts(fix=True):
+    """
+    Compare every stored counter with the unread DirectMessage count and,
+    with fix, correct the differing ones with one UPDATE
+
+    Returns:
+        int: Number of users whose counter differed
+    """
+    actual = unread_count_subquery()
+    drifted = db.session.execute(select(User.id, User.unread_message_count, actual)
+                                 .where(User.unread_message_count != actual)).all()
+    for user_id, stored, counted in drifted:
+        logger.warning(f"User #{user_id}: stored {stored} unread messages, counted {counted}")
+
+    if fix and drifted:
+        # Recomputed inside the UPDATE, so messages sent meanwhile are not lost
+        db.session.execute(update(User)
+                           .where(and_(User.id.in_([user_id for user_id, _, _ in drifted]),
+                                       User.unread_message_count != actual))
+                           .values(unread_message_count=actual))
+    return len(drifted)